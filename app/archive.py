@@ -0,0 +1,497 @@
+"""
+Cold-storage archive for ORM Dashboard API
+Scrubbed flights older than the hot window are moved out of the database into
+zstd-compressed Parquet files partitioned by flight month. Metric endpoints
+union hot rows with archived rows when a window reaches into archived history,
+scanning only matching partitions and row groups (date and unit pushdown).
+"""
+
+from sqlalchemy.orm import Session, selectinload
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import List, Optional, Union
+import fcntl
+import json
+import os
+import threading
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.fs as pafs
+import pyarrow.parquet as pq
+
+from .config import settings
+from .models import Flight, FlightHazard, CrewMember
+
+WATERMARK_FILE = "_watermark.json"
+LOCK_FILE = "_archive.lock"
+
+# Per-month manifests of archived-but-unpublished files; see FlightArchive.recover
+MANIFEST_DIR = "_manifests"
+
+PARTITIONING = ds.partitioning(pa.schema([("flight_month", pa.string())]), flavor="hive")
+
+FLIGHT_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("unit_id", pa.string()),
+    ("flight_date", pa.timestamp("us")),
+    ("aircraft_type", pa.string()),
+    ("mission_type", pa.string()),
+    ("total_risk_score", pa.int32()),
+    ("risk_tier", pa.string()),
+    ("crew_count", pa.int32()),
+    ("average_crew_risk", pa.string()),
+    ("is_briefed", pa.bool_()),
+    ("is_approved", pa.bool_()),
+    ("approval_by", pa.string()),
+    ("required_approval", pa.string()),
+    ("submitted_at", pa.timestamp("us")),
+    ("template_version", pa.string()),
+    ("schema_version", pa.int32()),
+    ("orm_matrix_snapshot", pa.string()),
+])
+
+HAZARD_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("flight_id", pa.string()),
+    ("unit_id", pa.string()),
+    ("flight_date", pa.timestamp("us")),
+    ("hazard_id", pa.string()),
+    ("hazard_name", pa.string()),
+    ("selected_option_id", pa.string()),
+    ("selected_option_label", pa.string()),
+    ("selected_severity", pa.string()),
+    ("score", pa.int32()),
+    ("hazard_snapshot", pa.string()),
+])
+
+# Crew names are PII and are not archived
+CREW_SCHEMA = pa.schema([
+    ("id", pa.string()),
+    ("flight_id", pa.string()),
+    ("unit_id", pa.string()),
+    ("flight_date", pa.timestamp("us")),
+    ("position", pa.string()),
+    ("total_score", pa.int32()),
+    ("risk_level", pa.string()),
+    ("showtime", pa.timestamp("us")),
+    ("responses", pa.string()),
+])
+
+DELETE_CHUNK_SIZE = 500
+
+def _temp_path(path: str) -> str:
+    # Dot-prefixed so dataset discovery ignores files that are not yet published
+    directory, filename = os.path.split(path)
+    return os.path.join(directory, f".{filename}.tmp")
+
+def _enum_value(value):
+    return value.value if value is not None else None
+
+def _json(value):
+    return json.dumps(value) if value is not None else None
+
+def _flight_rows(flights: List[Flight]) -> dict:
+    return {
+        "id": [f.id for f in flights],
+        "unit_id": [f.unit_id for f in flights],
+        "flight_date": [f.flight_date for f in flights],
+        "aircraft_type": [f.aircraft_type for f in flights],
+        "mission_type": [f.mission_type for f in flights],
+        "total_risk_score": [f.total_risk_score for f in flights],
+        "risk_tier": [_enum_value(f.risk_tier) for f in flights],
+        "crew_count": [f.crew_count for f in flights],
+        "average_crew_risk": [_enum_value(f.average_crew_risk) for f in flights],
+        "is_briefed": [f.is_briefed for f in flights],
+        "is_approved": [f.is_approved for f in flights],
+        "approval_by": [f.approval_by for f in flights],
+        "required_approval": [f.required_approval for f in flights],
+        "submitted_at": [f.submitted_at for f in flights],
+        "template_version": [f.template_version for f in flights],
+        "schema_version": [f.schema_version for f in flights],
+        "orm_matrix_snapshot": [_json(f.orm_matrix_snapshot) for f in flights],
+    }
+
+def _hazard_rows(flights: List[Flight]) -> dict:
+    pairs = [(f, h) for f in flights for h in f.hazard_responses]
+    return {
+        "id": [h.id for _, h in pairs],
+        "flight_id": [f.id for f, _ in pairs],
+        "unit_id": [f.unit_id for f, _ in pairs],
+        "flight_date": [f.flight_date for f, _ in pairs],
+        "hazard_id": [h.hazard_id for _, h in pairs],
+        "hazard_name": [h.hazard_name for _, h in pairs],
+        "selected_option_id": [h.selected_option_id for _, h in pairs],
+        "selected_option_label": [h.selected_option_label for _, h in pairs],
+        "selected_severity": [_enum_value(h.selected_severity) for _, h in pairs],
+        "score": [h.score for _, h in pairs],
+        "hazard_snapshot": [_json(h.hazard_snapshot) for _, h in pairs],
+    }
+
+def _crew_rows(flights: List[Flight]) -> dict:
+    pairs = [(f, c) for f in flights for c in f.crew_members]
+    return {
+        "id": [c.id for _, c in pairs],
+        "flight_id": [f.id for f, _ in pairs],
+        "unit_id": [f.unit_id for f, _ in pairs],
+        "flight_date": [f.flight_date for f, _ in pairs],
+        "position": [c.position for _, c in pairs],
+        "total_score": [c.total_score for _, c in pairs],
+        "risk_level": [_enum_value(c.risk_level) for _, c in pairs],
+        "showtime": [c.showtime for _, c in pairs],
+        "responses": [_json(c.responses) for _, c in pairs],
+    }
+
+class FlightArchive:
+    """Date-partitioned Parquet archive of flights, hazards and crew assessments"""
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        self._watermark = None
+        self._watermark_mtime = None
+        self._lock = threading.Lock()
+
+    def _table_dir(self, name: str) -> str:
+        return os.path.join(self.archive_dir, name)
+
+    def watermark(self) -> Optional[datetime]:
+        """Latest archived flight_date; cached until the watermark file changes"""
+        path = os.path.join(self.archive_dir, WATERMARK_FILE)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            return None
+        with self._lock:
+            if mtime != self._watermark_mtime:
+                with open(path) as f:
+                    self._watermark = datetime.fromisoformat(json.load(f)["latest_flight_date"])
+                self._watermark_mtime = mtime
+            return self._watermark
+
+    def covers(self, start_date: datetime) -> bool:
+        """Whether a window starting at start_date reaches into archived history"""
+        watermark = self.watermark()
+        return watermark is not None and start_date <= watermark
+
+    def _write_watermark(self, latest: datetime):
+        current = self.watermark()
+        if current is not None and current >= latest:
+            return
+        path = os.path.join(self.archive_dir, WATERMARK_FILE)
+        with open(_temp_path(path), "w") as f:
+            json.dump({"latest_flight_date": latest.isoformat()}, f)
+        os.replace(_temp_path(path), path)
+
+    def _write_month(self, name: str, schema: pa.Schema, rows: dict, month: str, run_id: str) -> Optional[str]:
+        table = pa.Table.from_pydict(rows, schema=schema)
+        if table.num_rows == 0:
+            return None
+        directory = os.path.join(self._table_dir(name), f"flight_month={month}")
+        os.makedirs(directory, exist_ok=True)
+        # Sorted by unit then date so row-group statistics prune both predicates
+        table = table.sort_by([("unit_id", "ascending"), ("flight_date", "ascending")])
+        path = os.path.join(directory, f"part-{run_id}.parquet")
+        pq.write_table(table, _temp_path(path), compression="zstd", row_group_size=64 * 1024)
+        return path
+
+    @contextmanager
+    def _exclusive(self, wait: bool):
+        """Archive-wide lock held by archive runs and recovery; yields False if busy"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        with open(os.path.join(self.archive_dir, LOCK_FILE), "a") as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX if wait else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _manifest_paths(self) -> List[str]:
+        directory = os.path.join(self.archive_dir, MANIFEST_DIR)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".json"))
+
+    def _write_manifest(self, month: str, run_id: str, paths: List[str], flight_ids: List[str], latest: datetime) -> str:
+        directory = os.path.join(self.archive_dir, MANIFEST_DIR)
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{run_id}-{month}.json")
+        with open(_temp_path(path), "w") as f:
+            json.dump({"paths": paths, "flight_ids": flight_ids, "latest_flight_date": latest.isoformat()}, f)
+        os.replace(_temp_path(path), path)
+        return path
+
+    def _publish(self, manifest_path: str, manifest: dict):
+        """Make a committed month visible: rename its files, advance the watermark, drop the manifest"""
+        for path in manifest["paths"]:
+            if os.path.exists(_temp_path(path)):
+                os.replace(_temp_path(path), path)
+        self._write_watermark(datetime.fromisoformat(manifest["latest_flight_date"]))
+        os.remove(manifest_path)
+
+    def _discard(self, manifest_path: str, manifest: dict):
+        for path in manifest["paths"]:
+            if os.path.exists(_temp_path(path)):
+                os.remove(_temp_path(path))
+        os.remove(manifest_path)
+
+    def recover(self, db: Session) -> dict:
+        """
+        Finish or roll back months left behind by an interrupted run.
+        A manifest whose flights are gone from the database was committed, so
+        its files are published and the watermark advanced; otherwise the
+        delete never committed and its unpublished files are discarded.
+        Skipped while another process holds the archive lock.
+        """
+        result = {"published": [], "discarded": []}
+        with self._exclusive(wait=False) as acquired:
+            if acquired:
+                self._recover(db, result)
+        return result
+
+    def _resolve(self, db: Session, manifest_path: str) -> str:
+        """Publish or discard one manifest depending on whether its delete committed"""
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        sample = manifest["flight_ids"][:DELETE_CHUNK_SIZE]
+        if db.query(Flight.id).filter(Flight.id.in_(sample)).first() is None:
+            self._publish(manifest_path, manifest)
+            return "published"
+        self._discard(manifest_path, manifest)
+        return "discarded"
+
+    def _recover(self, db: Session, result: dict):
+        for manifest_path in self._manifest_paths():
+            result[self._resolve(db, manifest_path)].append(os.path.basename(manifest_path))
+
+        # Unpublished files without a manifest come from a run that died while writing them
+        for name in ("flights", "flight_hazards", "crew_members"):
+            for directory, _, filenames in os.walk(self._table_dir(name)):
+                for filename in filenames:
+                    if filename.startswith(".") and filename.endswith(".tmp"):
+                        os.remove(os.path.join(directory, filename))
+
+    def archive(self, db: Session, older_than_days: int, dry_run: bool = False) -> dict:
+        """
+        Move scrubbed flights older than the cutoff (whole UTC days) into the
+        archive, one month per transaction. Files are written unpublished and
+        recorded in a manifest; they are published (with the watermark) only
+        after the database delete commits, so an interrupted run can always
+        be finished or rolled back by recover() without double counting.
+        """
+        with self._exclusive(wait=False) as acquired:
+            if not acquired:
+                raise RuntimeError("Another archive run is in progress")
+            recovered = {"published": [], "discarded": []}
+            if not dry_run:
+                self._recover(db, recovered)
+            result = self._archive(db, older_than_days, dry_run)
+            result["recovered"] = recovered
+            return result
+
+    def _archive(self, db: Session, older_than_days: int, dry_run: bool) -> dict:
+        cutoff = datetime.combine((datetime.utcnow() - timedelta(days=older_than_days)).date(), datetime.min.time())
+        run_id = datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+        eligible = db.query(Flight).filter(Flight.flight_date < cutoff, Flight.is_pii_scrubbed.is_(True))
+
+        result = {"cutoff": cutoff.isoformat(), "flights": eligible.count(), "months": []}
+        oldest = eligible.order_by(Flight.flight_date).first()
+        if dry_run or oldest is None:
+            return result
+
+        month_start = datetime(oldest.flight_date.year, oldest.flight_date.month, 1)
+        while month_start < cutoff:
+            month_end = min(datetime(month_start.year + month_start.month // 12, month_start.month % 12 + 1, 1), cutoff)
+            flights = eligible.filter(
+                Flight.flight_date >= month_start,
+                Flight.flight_date < month_end
+            ).options(
+                selectinload(Flight.hazard_responses),
+                selectinload(Flight.crew_members)
+            ).order_by(Flight.flight_date).all()
+
+            if flights:
+                self._archive_month(db, flights, month_start.strftime("%Y-%m"), run_id)
+                result["months"].append(month_start.strftime("%Y-%m"))
+            month_start = month_end
+
+        return result
+
+    def _archive_month(self, db: Session, flights: List[Flight], month: str, run_id: str):
+        latest = flights[-1].flight_date  # Read before commit expires the instances
+        flight_ids = [f.id for f in flights]
+        written, manifest_path = [], None
+        try:
+            for name, schema, rows in (
+                ("flights", FLIGHT_SCHEMA, _flight_rows(flights)),
+                ("flight_hazards", HAZARD_SCHEMA, _hazard_rows(flights)),
+                ("crew_members", CREW_SCHEMA, _crew_rows(flights)),
+            ):
+                path = self._write_month(name, schema, rows, month, run_id)
+                if path:
+                    written.append(path)
+            manifest_path = self._write_manifest(month, run_id, written, flight_ids, latest)
+
+            for i in range(0, len(flight_ids), DELETE_CHUNK_SIZE):
+                chunk = flight_ids[i:i + DELETE_CHUNK_SIZE]
+                db.query(FlightHazard).filter(FlightHazard.flight_id.in_(chunk)).delete(synchronize_session=False)
+                db.query(CrewMember).filter(CrewMember.flight_id.in_(chunk)).delete(synchronize_session=False)
+                db.query(Flight).filter(Flight.id.in_(chunk)).delete(synchronize_session=False)
+            db.commit()
+        except Exception:
+            db.rollback()
+            if manifest_path is None:
+                for path in written:
+                    os.remove(_temp_path(path))
+            else:
+                # A failed commit may still have landed; if the database cannot
+                # tell us now, the manifest stays for recover() to settle later
+                try:
+                    self._resolve(db, manifest_path)
+                except Exception:
+                    pass
+            raise
+
+        with open(manifest_path) as f:
+            self._publish(manifest_path, json.load(f))
+
+    def _scan(self, name: str, columns: List[str], units: Union[str, List[str], None], start: datetime, end: datetime) -> Optional[pa.Table]:
+        """Read columns of one archived table inside a window, for one unit, a list of units or all"""
+        directory = self._table_dir(name)
+        if not os.path.isdir(directory):
+            return None
+
+        dataset = ds.dataset(
+            directory,
+            format="parquet",
+            partitioning=PARTITIONING,
+            filesystem=pafs.LocalFileSystem(use_mmap=True)
+        )
+
+        # Partition pruning on month, then row-group pushdown on date and unit
+        expression = (
+            (ds.field("flight_month") >= start.strftime("%Y-%m"))
+            & (ds.field("flight_month") <= end.strftime("%Y-%m"))
+            & (ds.field("flight_date") >= pa.scalar(start, pa.timestamp("us")))
+            & (ds.field("flight_date") < pa.scalar(end, pa.timestamp("us")))
+        )
+        if isinstance(units, str):
+            expression = expression & (ds.field("unit_id") == units)
+        elif units is not None:
+            expression = expression & ds.field("unit_id").isin(units)
+
+        return dataset.to_table(columns=columns, filter=expression)
+
+    def flight_summary(self, units, start: datetime, end: datetime) -> dict:
+        """Archived counterpart of the metrics summary aggregates"""
+        summary = {
+            "total_flights": 0,
+            "total_risk_score": 0,
+            "max_risk_score": None,
+            "approved_count": 0,
+            "risk_distribution": {"low": 0, "medium": 0, "high": 0, "extreme": 0}
+        }
+        table = self._scan("flights", ["risk_tier", "total_risk_score", "is_approved"], units, start, end)
+        if table is None or table.num_rows == 0:
+            return summary
+
+        summary["total_flights"] = table.num_rows
+        summary["total_risk_score"] = pc.sum(table["total_risk_score"]).as_py() or 0
+        summary["max_risk_score"] = pc.max(table["total_risk_score"]).as_py()
+        summary["approved_count"] = pc.sum(pc.cast(pc.fill_null(table["is_approved"], False), pa.int64())).as_py() or 0
+        tiers = pc.value_counts(pc.fill_null(table["risk_tier"], "low"))
+        for entry in tiers.to_pylist():
+            summary["risk_distribution"][entry["values"]] += entry["counts"]
+        return summary
+
+    def daily_trend(self, units, start: datetime, end: datetime) -> list:
+        """Archived (day, flights, risk score sum, max risk score) groups"""
+        table = self._scan("flights", ["flight_date", "total_risk_score"], units, start, end)
+        if table is None or table.num_rows == 0:
+            return []
+
+        days = pa.table({
+            "day": pc.strftime(table["flight_date"], format="%Y-%m-%d"),
+            "score": pc.fill_null(table["total_risk_score"], 0)
+        })
+        grouped = days.group_by("day").aggregate([("score", "count"), ("score", "sum"), ("score", "max")])
+        return list(zip(
+            grouped["day"].to_pylist(),
+            grouped["score_count"].to_pylist(),
+            grouped["score_sum"].to_pylist(),
+            grouped["score_max"].to_pylist()
+        ))
+
+    def hazard_counts(self, units, start: datetime, end: datetime) -> list:
+        """Archived (hazard_name, severity, count) groups"""
+        table = self._scan("flight_hazards", ["hazard_name", "selected_severity"], units, start, end)
+        if table is None or table.num_rows == 0:
+            return []
+
+        table = table.set_column(1, "selected_severity", pc.fill_null(table["selected_severity"], "low"))
+        grouped = table.group_by(["hazard_name", "selected_severity"]).aggregate([("hazard_name", "count")])
+        return list(zip(
+            grouped["hazard_name"].to_pylist(),
+            grouped["selected_severity"].to_pylist(),
+            grouped["hazard_name_count"].to_pylist()
+        ))
+
+    def hazard_rows(self, units, start: datetime, end: datetime, risk_tiers: Optional[List[str]] = None) -> list:
+        """
+        Archived (flight_id, hazard_name, severity, total_risk_score) rows,
+        ordered by flight, optionally limited to flights in risk_tiers
+        """
+        hazards = self._scan("flight_hazards", ["flight_id", "hazard_name", "selected_severity"], units, start, end)
+        flights = self._scan("flights", ["id", "total_risk_score", "risk_tier"], units, start, end)
+        if hazards is None or flights is None or hazards.num_rows == 0:
+            return []
+
+        if risk_tiers is not None:
+            flights = flights.filter(pc.is_in(flights["risk_tier"], value_set=pa.array(risk_tiers)))
+        flights = flights.select(["id", "total_risk_score"]).rename_columns(["flight_id", "total_risk_score"])
+        joined = hazards.join(flights, "flight_id", join_type="inner").sort_by("flight_id")
+        return list(zip(*(
+            joined[column].to_pylist()
+            for column in ("flight_id", "hazard_name", "selected_severity", "total_risk_score")
+        )))
+
+    def crew_summary(self, units, start: datetime, end: datetime) -> dict:
+        """
+        Archived counterpart of the crew metrics aggregates: (position,
+        risk_level, count, score sum) groups and flight counts by average crew risk
+        """
+        summary = {"groups": [], "average_crew_risk": {"low": 0, "medium": 0, "high": 0, "extreme": 0}}
+
+        crew = self._scan("crew_members", ["position", "risk_level", "total_score"], units, start, end)
+        if crew is not None and crew.num_rows:
+            crew = pa.table({
+                "position": crew["position"],
+                "risk_level": pc.fill_null(crew["risk_level"], "low"),
+                "score": pc.fill_null(crew["total_score"], 0)
+            })
+            grouped = crew.group_by(["position", "risk_level"]).aggregate([("score", "count"), ("score", "sum")])
+            summary["groups"] = list(zip(
+                grouped["position"].to_pylist(),
+                grouped["risk_level"].to_pylist(),
+                grouped["score_count"].to_pylist(),
+                grouped["score_sum"].to_pylist()
+            ))
+
+        flights = self._scan("flights", ["average_crew_risk"], units, start, end)
+        if flights is not None and flights.num_rows:
+            for entry in pc.value_counts(pc.fill_null(flights["average_crew_risk"], "low")).to_pylist():
+                summary["average_crew_risk"][entry["values"]] += entry["counts"]
+        return summary
+
+    def column_values(self, name: str, column: str, units, start: datetime, end: datetime) -> list:
+        """Non-null values of one archived column inside a window"""
+        table = self._scan(name, [column], units, start, end)
+        if table is None or table.num_rows == 0:
+            return []
+        return pc.drop_null(table[column]).to_pylist()
+
+flight_archive = FlightArchive(settings.archive_dir)
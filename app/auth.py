@@ -0,0 +1,48 @@
+"""
+Authentication for ORM Dashboard API
+Bearer JWTs signed with SECRET_KEY; the token subject is the user ID
+"""
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from jose import jwt, JWTError
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta
+from typing import Optional
+
+from .config import settings
+from .database import get_db
+from .models import User
+
+bearer_scheme = HTTPBearer(auto_error=False)
+
+def create_access_token(user_id: str, expires_minutes: Optional[int] = None) -> str:
+    """Issue a signed access token for a user"""
+    minutes = settings.access_token_expire_minutes if expires_minutes is None else expires_minutes
+    claims = {"sub": user_id, "exp": datetime.utcnow() + timedelta(minutes=minutes)}
+    return jwt.encode(claims, settings.secret_key, algorithm=settings.algorithm)
+
+def get_current_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(bearer_scheme),
+    db: Session = Depends(get_db)
+) -> User:
+    """
+    Dependency resolving the active user from a verified bearer token
+    """
+    unauthorized = HTTPException(
+        status_code=401,
+        detail="Invalid or missing access token",
+        headers={"WWW-Authenticate": "Bearer"}
+    )
+    if credentials is None:
+        raise unauthorized
+
+    try:
+        claims = jwt.decode(credentials.credentials, settings.secret_key, algorithms=[settings.algorithm])
+    except JWTError:
+        raise unauthorized
+
+    user = db.get(User, claims.get("sub")) if claims.get("sub") else None
+    if user is None or not user.is_active:
+        raise unauthorized
+    return user
@@ -12,6 +12,11 @@ class Settings(BaseSettings):
     # Database
     database_url: str = "sqlite:///./orm_dashboard.db"  # Default to SQLite for development
 
+    # Read replicas - optional, comma-separated; read-only endpoints are routed here
+    database_replica_urls: Union[str, List[str]] = []
+    replica_eject_seconds: int = 30  # How long a failing replica is kept out of rotation
+    read_your_writes_seconds: int = 10  # Window after a submission where reads stay on primary
+
     # Security
     secret_key: str = "development-secret-key-change-in-production"
     algorithm: str = "HS256"
@@ -28,6 +33,27 @@ class Settings(BaseSettings):
             return [origin.strip() for origin in v.split(',')]
         return v
 
+    @field_validator('database_replica_urls')
+    @classmethod
+    def parse_database_replica_urls(cls, v):
+        if isinstance(v, str):
+            return [url.strip() for url in v.split(',') if url.strip()]
+        return v
+
+    # Data sanitization
+    pii_retention_hours: int = 24  # Flights older than this are scrubbed and leave the live board
+    live_board_reconcile_seconds: int = 60  # Resync the in-memory live board with the database
+
+    # Cold storage
+    archive_dir: str = "./archive"  # Parquet archive of old scrubbed flights
+    archive_after_days: int = 180  # Default age for archive_flights.py
+
+    # Report exports
+    report_dir: str = "./reports"  # Local artifact cache for generated reports
+    report_workers: int = 2  # Report rendering processes
+    report_max_pending: int = 20  # Queued/running jobs before new submissions are refused
+    report_job_timeout_seconds: int = 900  # Unfinished jobs older than this are reported failed and can be resubmitted
+
     # Application
     environment: str = "development"
     sql_debug: bool = False
@@ -63,6 +89,11 @@ class Settings(BaseSettings):
             print(f"No database URL found. Checked: {database_env_vars}")
             print("Available env vars:", [k for k in os.environ.keys() if 'DATABASE' in k.upper() or 'POSTGRES' in k.upper()])
 
+        if os.getenv("DATABASE_REPLICA_URLS"):
+            self.database_replica_urls = [
+                url.strip() for url in os.getenv("DATABASE_REPLICA_URLS").split(",") if url.strip()
+            ]
+
         if os.getenv("SECRET_KEY"):
             self.secret_key = os.getenv("SECRET_KEY")
 
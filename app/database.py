@@ -1,29 +1,106 @@
 """
 Database configuration for ORM Dashboard API
 SQLAlchemy setup with support for both SQLite (dev) and PostgreSQL (prod)
+Optional read replicas serve read-only dashboard endpoints
 """
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from fastapi import Request, Response
+from typing import Generator, List, Optional
+import itertools
+import threading
+import time
 
 from .config import settings
 
-# Create SQLAlchemy engine
-engine = create_engine(
-    settings.database_url,
-    echo=settings.sql_debug,
-    # SQLite specific settings
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {}
-)
+# Cookie/header used for the read-your-writes escape hatch
+READ_PRIMARY_COOKIE = "orm_read_primary_until"
+READ_PRIMARY_HEADER = "X-Read-Primary"
+
+def _create_engine(url: str):
+    """Create an engine with the project's standard options"""
+    return create_engine(
+        url,
+        echo=settings.sql_debug,
+        # SQLite specific settings
+        connect_args={"check_same_thread": False} if "sqlite" in url else {},
+        pool_pre_ping="sqlite" not in url
+    )
+
+# Create SQLAlchemy engine (primary - all writes go here)
+engine = _create_engine(settings.database_url)
 
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Session factory for replica reads; bound per session by ReplicaPool
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False)
+
 # Create Base class for models
 Base = declarative_base()
 
+class ReplicaPool:
+    """
+    Round-robin pool of read replica engines with health-based ejection.
+    A replica that raises a connection-level error is taken out of rotation
+    for `eject_seconds`, after which it is tried again. When no replica is
+    healthy, reads fall back to the primary engine.
+    """
+
+    def __init__(self, urls: List[str], primary, eject_seconds: int = 30):
+        self.primary = primary
+        self.eject_seconds = eject_seconds
+        self.engines = [_create_engine(url) for url in urls]
+        self._ejected_until = {id(e): 0.0 for e in self.engines}
+        self._cycle = itertools.cycle(self.engines) if self.engines else None
+        self._lock = threading.Lock()
+
+        for replica in self.engines:
+            event.listen(replica, "handle_error", self._on_error)
+
+    def _on_error(self, context):
+        # Only eject on connectivity problems, not on bad SQL
+        if context.is_disconnect or context.connection is None:
+            self.eject(context.engine)
+
+    def eject(self, replica):
+        with self._lock:
+            if id(replica) in self._ejected_until:
+                self._ejected_until[id(replica)] = time.monotonic() + self.eject_seconds
+
+    def is_healthy(self, replica) -> bool:
+        return self._ejected_until.get(id(replica), 0.0) <= time.monotonic()
+
+    def next_engine(self):
+        """Return the next healthy replica, or the primary if none are available"""
+        if not self._cycle:
+            return self.primary
+        with self._lock:
+            for _ in range(len(self.engines)):
+                candidate = next(self._cycle)
+                if self.is_healthy(candidate):
+                    return candidate
+        return self.primary
+
+    def status(self) -> list:
+        return [
+            {
+                "replica": index,
+                "healthy": self.is_healthy(replica),
+                "ejected_for_seconds": max(0, round(self._ejected_until[id(replica)] - time.monotonic(), 1))
+            }
+            for index, replica in enumerate(self.engines)
+        ]
+
+replica_pool = ReplicaPool(
+    settings.database_replica_urls,
+    primary=engine,
+    eject_seconds=settings.replica_eject_seconds
+)
+
 def get_db() -> Generator:
     """
     Dependency to get database session
@@ -34,8 +111,77 @@ def get_db() -> Generator:
     finally:
         db.close()
 
+def reads_pinned_to_primary(request: Request) -> bool:
+    """Read-your-writes: honour an explicit header or a recent-write cookie"""
+    if request.headers.get(READ_PRIMARY_HEADER, "").lower() in ("1", "true", "yes"):
+        return True
+    until = request.cookies.get(READ_PRIMARY_COOKIE)
+    try:
+        return until is not None and float(until) > time.time()
+    except ValueError:
+        return False
+
+def _checked_out_session(bind):
+    """Session with its connection already checked out, so a dead replica fails here"""
+    db = ReadSessionLocal(bind=bind)
+    try:
+        db.connection()
+    except BaseException:
+        db.close()
+        raise
+    return db
+
+def open_read_session(primary: bool = False):
+    """
+    Open a read-only session on the primary or the next healthy replica.
+    A replica that fails to connect is ejected and the read is retried on
+    the next healthy replica, then on the primary, so an outage does not
+    surface as an error.
+    """
+    if primary:
+        return SessionLocal()
+
+    # One pick per read keeps the round-robin even; the pool is only asked
+    # again after that pick fails to connect
+    bind = replica_pool.next_engine()
+    for _ in range(2):
+        if bind is replica_pool.primary:
+            break
+        try:
+            return _checked_out_session(bind)
+        except DBAPIError:
+            replica_pool.eject(bind)
+            bind = replica_pool.next_engine()
+    return SessionLocal()
+
+def get_read_db(request: Request) -> Generator:
+    """
+    Dependency to get a read-only database session.
+    Routed to a replica unless the client recently wrote or asked for the primary.
+    """
+    db = open_read_session(primary=reads_pinned_to_primary(request))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def mark_primary_reads(response: Response, seconds: Optional[int] = None):
+    """
+    Pin the client's reads to the primary for a short window after a write,
+    so replica lag never hides data the client just submitted
+    """
+    seconds = settings.read_your_writes_seconds if seconds is None else seconds
+    if seconds > 0:
+        response.set_cookie(
+            READ_PRIMARY_COOKIE,
+            str(time.time() + seconds),
+            max_age=seconds,
+            httponly=True,
+            samesite="lax"
+        )
+
 def create_tables():
     """
     Create all tables in the database
     """
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
@@ -0,0 +1,265 @@
+"""
+Hazard co-occurrence analytics for ORM Dashboard API
+Builds a sparse flight x hazard matrix and computes co-occurrence counts,
+lift and each hazard's correlation with flight risk score using NumPy/SciPy
+"""
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from collections import OrderedDict
+from datetime import datetime
+from operator import itemgetter
+from typing import Optional
+import itertools
+import threading
+import time
+
+import numpy as np
+from scipy import sparse
+
+from .models import Flight, FlightHazard, SeverityLevel
+from .archive import flight_archive
+
+# Rows fetched per round-trip when streaming flight_hazards
+STREAM_CHUNK_SIZE = 50000
+
+# Seconds a computed result is reused for the same (unit scope, window, read target),
+# and how many distinct results are kept (least recently used go first)
+CACHE_TTL_SECONDS = 300
+CACHE_MAX_ENTRIES = 128
+
+HIGH_RISK_TIERS = (SeverityLevel.HIGH, SeverityLevel.EXTREME)
+
+# Ordinal encoding of hazard severity; unrated responses count as low
+SEVERITY_RANK = {None: 0, SeverityLevel.LOW: 0, SeverityLevel.MEDIUM: 1, SeverityLevel.HIGH: 2, SeverityLevel.EXTREME: 3}
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+def load_hazard_rows(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    unit_id: Optional[str] = None,
+    high_risk_only: bool = False
+):
+    """
+    Stream (flight_id, hazard_name, severity, total_risk_score) rows in chunks,
+    followed by archived rows when the window reaches into archived history.
+    Returns (flight_codes, hazard_codes, hazard_labels, severities, flight_scores)
+    where severities are SEVERITY_RANK codes and flight_scores is indexed by flight code.
+    """
+    query = select(
+        FlightHazard.flight_id,
+        FlightHazard.hazard_name,
+        FlightHazard.selected_severity,
+        Flight.total_risk_score
+    ).join(Flight, FlightHazard.flight_id == Flight.id).where(
+        Flight.flight_date >= start_date,
+        Flight.flight_date <= end_date
+    )
+
+    if unit_id:
+        query = query.where(Flight.unit_id == unit_id)
+
+    if high_risk_only:
+        query = query.where(Flight.risk_tier.in_(HIGH_RISK_TIERS))
+
+    result = db.execute(query.execution_options(yield_per=STREAM_CHUNK_SIZE))
+    chunks = result.partitions()
+
+    if flight_archive.covers(start_date):
+        archived = flight_archive.hazard_rows(
+            unit_id, start_date, end_date,
+            risk_tiers=[tier.value for tier in HIGH_RISK_TIERS] if high_risk_only else None
+        )
+        chunks = itertools.chain(chunks, (archived[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(archived), STREAM_CHUNK_SIZE)))
+
+    return encode_hazard_rows(chunks)
+
+def _factorize(values: np.ndarray, lookup: dict) -> np.ndarray:
+    """
+    Integer codes for one chunk's column. Runs of equal values (a flight's
+    rows arrive together) are collapsed first, np.unique factorizes the run
+    heads, and the chunk's distinct values are remapped to codes that stay
+    stable across chunks.
+    """
+    heads = np.flatnonzero(np.r_[True, values[1:] != values[:-1]])
+    uniques, inverse = np.unique(values[heads].astype(str), return_inverse=True)
+    remap = np.fromiter(
+        (lookup.setdefault(value, len(lookup)) for value in uniques.tolist()),
+        dtype=np.int64,
+        count=uniques.size
+    )
+    return np.repeat(remap[inverse.reshape(-1)], np.diff(np.r_[heads, values.size]))
+
+def _severity_ranks(values: np.ndarray) -> np.ndarray:
+    """SEVERITY_RANK codes for severities given as SeverityLevel members or their values"""
+    ranks = np.zeros(values.size, dtype=np.int8)
+    for level, rank in SEVERITY_RANK.items():
+        if level is not None and rank:
+            ranks[(values == level) | (values == level.value)] = rank
+    return ranks
+
+def encode_hazard_rows(chunks):
+    """
+    Factorize streamed row chunks into integer-coded column arrays so only
+    compact arrays are kept in memory
+    """
+    flight_lookup, hazard_lookup = {}, {}
+    flight_codes, hazard_codes, severities, scores = [], [], [], []
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        flight_col, hazard_col, severity_col, score_col = (
+            np.array(list(map(itemgetter(i), chunk)), dtype=object) for i in range(4)
+        )
+        flight_codes.append(_factorize(flight_col, flight_lookup))
+        hazard_codes.append(_factorize(hazard_col, hazard_lookup))
+        severities.append(_severity_ranks(severity_col))
+        scores.append(np.nan_to_num(score_col.astype(np.float64)))
+
+    if not flight_codes:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty, [], np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.float64)
+
+    flight_codes = np.concatenate(flight_codes)
+
+    # Every row of a flight carries the same score, so a scatter gives one value per flight
+    flight_scores = np.zeros(len(flight_lookup), dtype=np.float64)
+    flight_scores[flight_codes] = np.concatenate(scores)
+
+    return (
+        flight_codes,
+        np.concatenate(hazard_codes),
+        list(hazard_lookup),
+        np.concatenate(severities),
+        flight_scores
+    )
+
+def compute_cooccurrence(
+    flight_index: np.ndarray,
+    hazard_index: np.ndarray,
+    hazard_labels: list,
+    severities: np.ndarray,
+    flight_scores: np.ndarray,
+    min_support: int = 1,
+    top: int = 50,
+    min_severity: int = 1
+) -> dict:
+    """
+    Compute hazard co-occurrence statistics from per-row flight/hazard codes.
+    `severities` holds SEVERITY_RANK codes per row and `flight_scores` the
+    total_risk_score per flight code. A hazard counts as present on a flight
+    only when it was rated at least `min_severity` (a SEVERITY_RANK code);
+    checklists list every hazard on every flight, so unfiltered presence
+    would make lift meaningless.
+    """
+    if flight_index.size == 0:
+        return {"total_flights": 0, "hazards": [], "pairs": []}
+
+    n_flights = flight_scores.size
+    n_hazards = len(hazard_labels)
+
+    # Binary presence matrix - duplicate (flight, hazard) rows collapse to 1
+    rated = severities >= min_severity
+    presence = sparse.csr_matrix(
+        (np.ones(int(rated.sum()), dtype=np.float64), (flight_index[rated], hazard_index[rated])),
+        shape=(n_flights, n_hazards)
+    )
+    presence.data[:] = 1.0
+
+    # Co-occurrence counts: C[i, j] = flights containing both hazard i and j
+    cooccurrence = (presence.T @ presence).tocsr()
+    support = cooccurrence.diagonal()
+
+    # Point-biserial correlation of hazard presence with flight risk score
+    score_mean = flight_scores.mean()
+    score_std = flight_scores.std()
+    presence_rate = support / n_flights
+    covariance = (presence.T @ flight_scores) / n_flights - presence_rate * score_mean
+    presence_std = np.sqrt(presence_rate * (1.0 - presence_rate))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / (presence_std * score_std)
+    correlation = np.nan_to_num(correlation, nan=0.0, posinf=0.0, neginf=0.0)
+
+    # Mean risk score of flights where each hazard appears
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_score_with = np.nan_to_num((presence.T @ flight_scores) / support)
+
+    # Share of each hazard's responses rated high or extreme
+    severe_rows = np.bincount(hazard_index, weights=(severities >= 2), minlength=n_hazards)
+    total_rows = np.bincount(hazard_index, minlength=n_hazards)
+    severe_rate = severe_rows / total_rows
+
+    # Pairs from the upper triangle, filtered by support
+    pairs = sparse.triu(cooccurrence, k=1).tocoo()
+    keep = pairs.data >= min_support
+    pair_i, pair_j, pair_count = pairs.row[keep], pairs.col[keep], pairs.data[keep]
+    lift = pair_count * n_flights / (support[pair_i] * support[pair_j])
+    order = np.lexsort((-lift, -pair_count))[:top]
+
+    hazards = [
+        {
+            "hazard": str(hazard_labels[j]),
+            "flights": int(support[j]),
+            "prevalence": round(float(presence_rate[j]), 4),
+            "mean_risk_score": round(float(mean_score_with[j]), 2),
+            "high_severity_rate": round(float(severe_rate[j]), 4),
+            "risk_correlation": round(float(correlation[j]), 4)
+        }
+        for j in np.argsort(-correlation)
+        if support[j]
+    ]
+
+    return {
+        "total_flights": int(n_flights),
+        "hazards": hazards,
+        "pairs": [
+            {
+                "hazard_a": str(hazard_labels[pair_i[k]]),
+                "hazard_b": str(hazard_labels[pair_j[k]]),
+                "count": int(pair_count[k]),
+                "lift": round(float(lift[k]), 4)
+            }
+            for k in order
+        ]
+    }
+
+def get_hazard_cooccurrence(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    days: int,
+    unit_id: Optional[str] = None,
+    high_risk_only: bool = False,
+    min_support: int = 1,
+    top: int = 50,
+    min_severity: SeverityLevel = SeverityLevel.MEDIUM,
+    read_target: str = "replica"
+) -> dict:
+    """
+    Cached entry point keyed by (unit scope, window, filters, read target).
+    Primary-pinned reads never reuse a result computed on a lagging replica.
+    """
+    key = (unit_id or "*", days, high_risk_only, min_support, top, min_severity, read_target)
+    now = time.monotonic()
+
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached and cached[0] > now:
+            _cache.move_to_end(key)
+            return cached[1]
+
+    columns = load_hazard_rows(db, start_date, end_date, unit_id=unit_id, high_risk_only=high_risk_only)
+    result = compute_cooccurrence(
+        *columns, min_support=min_support, top=top, min_severity=SEVERITY_RANK[min_severity]
+    )
+
+    with _cache_lock:
+        _cache[key] = (now + CACHE_TTL_SECONDS, result)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+    return result
@@ -0,0 +1,234 @@
+"""
+Live board of recent flights for ORM Dashboard API
+Per-worker in-memory index of the unscrubbed flights inside the PII
+retention window (the last PII_RETENTION_HOURS), serving the dashboard's
+live view without touching the database. Fed incrementally by committed
+Flight writes in this worker, reconciled against the primary periodically
+for multi-worker deployments, and evicted at the PII scrub cutoff.
+"""
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from heapq import merge
+from itertools import islice
+from typing import Dict, List, Optional
+import threading
+import time
+
+from .config import settings
+from .models import Flight
+
+class LiveFlight:
+    """Compact, pre-flattened flight record for the live board"""
+
+    __slots__ = (
+        "id", "unit_id", "callsign", "aircraft_type", "mission_type", "flight_date",
+        "total_risk_score", "risk_tier", "is_approved", "is_briefed", "crew_count",
+        "aircraft_commander", "is_pii_scrubbed"
+    )
+
+    def __init__(self, flight: Flight):
+        self.id = flight.id
+        self.unit_id = flight.unit_id
+        self.callsign = flight.callsign
+        self.aircraft_type = flight.aircraft_type
+        self.mission_type = flight.mission_type
+        self.flight_date = flight.flight_date
+        self.total_risk_score = flight.total_risk_score
+        self.risk_tier = flight.risk_tier.value if flight.risk_tier else None
+        self.is_approved = flight.is_approved
+        self.is_briefed = flight.is_briefed
+        self.crew_count = flight.crew_count
+        self.aircraft_commander = flight.aircraft_commander
+        self.is_pii_scrubbed = flight.is_pii_scrubbed
+
+    def to_dict(self) -> dict:
+        # Same shape as the /api/v1/flights database path
+        return {
+            "id": self.id,
+            "unit_id": self.unit_id,
+            "callsign": self.callsign,
+            "aircraft_type": self.aircraft_type,
+            "mission_type": self.mission_type,
+            "flight_date": self.flight_date.isoformat(),
+            "total_risk_score": self.total_risk_score,
+            "risk_tier": self.risk_tier,
+            "is_approved": self.is_approved,
+            "is_briefed": self.is_briefed,
+            "crew_count": self.crew_count,
+            "aircraft_commander": self.aircraft_commander if not self.is_pii_scrubbed else "[REDACTED]"
+        }
+
+class LiveBoard:
+    """
+    Flights inside the PII retention window, per unit, sorted by flight_date.
+    Parallel date lists allow bisect inserts and prefix eviction.
+    """
+
+    def __init__(self, retention_hours: int = 24, reconcile_seconds: int = 60):
+        self.retention = timedelta(hours=retention_hours)
+        self.reconcile_seconds = reconcile_seconds
+        self._dates: Dict[str, List[datetime]] = {}
+        self._records: Dict[str, List[LiveFlight]] = {}
+        self._by_id: Dict[str, LiveFlight] = {}
+        # Writes committed in this worker: id -> (monotonic time, record or None if deleted)
+        self._local_writes: Dict[str, tuple] = {}
+        self._tracking = False
+        self._reconciled_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+    def cutoff(self) -> datetime:
+        return datetime.utcnow() - self.retention
+
+    def _belongs(self, record: LiveFlight) -> bool:
+        return (
+            record.flight_date is not None
+            and record.unit_id is not None
+            and not record.is_pii_scrubbed
+            and record.flight_date >= self.cutoff()
+        )
+
+    def _remove(self, flight_id: str):
+        record = self._by_id.pop(flight_id, None)
+        if record is None:
+            return
+        dates, records = self._dates[record.unit_id], self._records[record.unit_id]
+        i = bisect_left(dates, record.flight_date)
+        while records[i] is not record:
+            i += 1
+        del dates[i]
+        del records[i]
+
+    def _insert(self, record: LiveFlight):
+        self._remove(record.id)
+        if not self._belongs(record):
+            return
+        dates = self._dates.setdefault(record.unit_id, [])
+        records = self._records.setdefault(record.unit_id, [])
+        i = bisect_right(dates, record.flight_date)
+        dates.insert(i, record.flight_date)
+        records.insert(i, record)
+        self._by_id[record.id] = record
+
+    def _track_local(self, flight_id: str, record: Optional[LiveFlight]):
+        # Only needed to replay over a reconcile; an unused board keeps nothing
+        if self._tracking:
+            self._local_writes[flight_id] = (time.monotonic(), record)
+
+    def upsert(self, record: LiveFlight):
+        """Insert, move or drop a flight record after it was written"""
+        with self._lock:
+            self._track_local(record.id, record)
+            self._insert(record)
+
+    def remove(self, flight_id: str):
+        with self._lock:
+            self._track_local(flight_id, None)
+            self._remove(flight_id)
+
+    def evict_expired(self):
+        """Drop every record older than the scrub cutoff (a prefix of each unit's list)"""
+        cutoff = self.cutoff()
+        replay_horizon = time.monotonic() - self.reconcile_seconds
+        with self._lock:
+            # A reconcile only replays writes made while its query ran
+            for flight_id in [f for f, (written_at, _) in self._local_writes.items() if written_at < replay_horizon]:
+                del self._local_writes[flight_id]
+            for unit_id, dates in self._dates.items():
+                expired = bisect_left(dates, cutoff)
+                if expired:
+                    for record in self._records[unit_id][:expired]:
+                        del self._by_id[record.id]
+                    del dates[:expired]
+                    del self._records[unit_id][:expired]
+
+    def needs_reconcile(self) -> bool:
+        return self._reconciled_at is None or time.monotonic() - self._reconciled_at >= self.reconcile_seconds
+
+    def reconcile(self, db: Session):
+        """
+        Rebuild from the database to pick up writes made by other workers.
+        `db` should read the primary: a lagging replica would drop flights
+        this worker already committed. Local writes committed after the
+        rebuild query started are replayed over the new snapshot.
+        """
+        with self._lock:
+            self._tracking = True
+        started = time.monotonic()
+        flights = db.query(Flight).filter(
+            Flight.flight_date >= self.cutoff(),
+            Flight.is_pii_scrubbed.isnot(True)
+        ).order_by(Flight.flight_date).all()
+
+        dates, records, by_id = {}, {}, {}
+        for flight in flights:
+            record = LiveFlight(flight)
+            dates.setdefault(record.unit_id, []).append(record.flight_date)
+            records.setdefault(record.unit_id, []).append(record)
+            by_id[record.id] = record
+
+        with self._lock:
+            self._dates, self._records, self._by_id = dates, records, by_id
+            for flight_id, (written_at, record) in list(self._local_writes.items()):
+                if written_at < started:
+                    # Committed before the query began, so the snapshot has it
+                    del self._local_writes[flight_id]
+                elif record is None:
+                    self._remove(flight_id)
+                else:
+                    self._insert(record)
+            self._reconciled_at = time.monotonic()
+
+    def count(self, unit_id: Optional[str] = None) -> int:
+        with self._lock:
+            if unit_id:
+                return len(self._records.get(unit_id, ()))
+            return len(self._by_id)
+
+    def latest(self, limit: int, unit_id: Optional[str] = None) -> List[LiveFlight]:
+        """Most recent flights first, like ORDER BY flight_date DESC LIMIT n"""
+        limit = max(limit, 0)
+        self.evict_expired()
+        with self._lock:
+            if unit_id:
+                return list(islice(reversed(self._records.get(unit_id, ())), limit))
+            newest_first = [reversed(records) for records in self._records.values()]
+            return list(islice(merge(*newest_first, key=lambda r: r.flight_date, reverse=True), limit))
+
+def _track_flights(session: Session, flush_context):
+    """
+    Snapshot flights written in this transaction until it commits.
+    Records are taken here because attributes are expired (and SQL cannot
+    be emitted) by the time after_commit runs.
+    """
+    pending = session.info.setdefault("live_board_flights", {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Flight):
+            pending[obj.id] = LiveFlight(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Flight):
+            pending[obj.id] = None
+
+def _apply_committed(session: Session):
+    pending = session.info.pop("live_board_flights", None)
+    if not pending:
+        return
+    for flight_id, record in pending.items():
+        if record is None:
+            live_board.remove(flight_id)
+        else:
+            live_board.upsert(record)
+
+def _discard_pending(session: Session):
+    session.info.pop("live_board_flights", None)
+
+live_board = LiveBoard(
+    retention_hours=settings.pii_retention_hours,
+    reconcile_seconds=settings.live_board_reconcile_seconds
+)
+
+event.listen(Session, "after_flush", _track_flights)
+event.listen(Session, "after_commit", _apply_committed)
+event.listen(Session, "after_rollback", _discard_pending)
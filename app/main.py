@@ -3,17 +3,26 @@ FastAPI main application for ORM Dashboard API
 Secure backend for Commander's Dashboard - companion to iORM mobile app
 """
 
-from fastapi import FastAPI, Depends, HTTPException
+from fastapi import FastAPI, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import text
-from typing import List
+from typing import List, Optional
 import os
 from datetime import datetime
 
-from .database import get_db, engine
-from .models import Base, Flight, Unit, User, SeverityLevel, FlightHazard
+from .database import (
+    get_db, get_read_db, open_read_session, reads_pinned_to_primary, SessionLocal,
+    mark_primary_reads, engine, replica_pool
+)
+from .models import Base, Flight, Unit, User, UserRole, SeverityLevel, FlightHazard, CrewMember, AuditEvent
 from .config import settings
+from .singleflight import SingleFlight, metrics_flight, request_key
+from .live_board import live_board
+from .reports import report_jobs, REPORT_FORMATS
+from .archive import flight_archive
+from .auth import get_current_user
 
 # Create tables with error handling
 try:
@@ -65,23 +74,62 @@ async def health_check(db: Session = Depends(get_db)):
     return {
         "status": "healthy" if db_status == "connected" else "unhealthy",
         "database": db_status,
+        "replicas": replica_pool.status(),
+        "coalescing": metrics_flight.stats(),
         "timestamp": datetime.utcnow().isoformat(),
         "version": "1.0.0"
     }
 
+# Coalesces live board reconciles so a burst of live polls runs one rebuild
+live_reconcile_flight = SingleFlight()
+
+def _reconcile_live_board():
+    """Rebuild the live board from the primary (blocking; run in the threadpool)"""
+    primary = open_read_session(primary=True)
+    try:
+        live_board.reconcile(primary)
+    finally:
+        primary.close()
+
 @app.get("/api/v1/flights")
 async def get_flights(
+    request: Request,
     limit: int = 50,
     unit_id: str = None,
-    db: Session = Depends(get_db)
+    live: bool = False
 ):
-    """Get flights for dashboard with optional filtering"""
-    query = db.query(Flight)
+    """
+    Get flights for dashboard with optional filtering
+    live=true serves the unscrubbed flights of the PII retention window
+    (the last PII_RETENTION_HOURS, not the calendar day) from the live board
+    without touching the database, apart from its periodic reconcile
+    """
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
 
-    if unit_id:
-        query = query.filter(Flight.unit_id == unit_id)
+    if live:
+        if live_board.needs_reconcile():
+            # Off the event loop, and shared by concurrent live requests
+            await live_reconcile_flight.do("reconcile", _reconcile_live_board)
 
-    flights = query.order_by(Flight.flight_date.desc()).limit(limit).all()
+        board = live_board.latest(limit, unit_id=unit_id)
+        return {
+            "data": [record.to_dict() for record in board],
+            "total": len(board),
+            "source": "live",
+            "timestamp": datetime.utcnow().isoformat()
+        }
+
+    db = open_read_session(primary=reads_pinned_to_primary(request))
+    try:
+        query = db.query(Flight)
+
+        if unit_id:
+            query = query.filter(Flight.unit_id == unit_id)
+
+        flights = query.order_by(Flight.flight_date.desc()).limit(limit).all()
+    finally:
+        db.close()
 
     return {
         "data": [
@@ -102,11 +150,12 @@ async def get_flights(
             for flight in flights
         ],
         "total": len(flights),
+        "source": "database",
         "timestamp": datetime.utcnow().isoformat()
     }
 
 @app.get("/api/v1/units")
-async def get_units(db: Session = Depends(get_db)):
+async def get_units(db: Session = Depends(get_read_db)):
     """Get available units for dashboard"""
     units = db.query(Unit).all()
 
@@ -124,13 +173,45 @@ async def get_units(db: Session = Depends(get_db)):
         "timestamp": datetime.utcnow().isoformat()
     }
 
+def _read_target(request: Request, days: Optional[int] = None) -> str:
+    """
+    Database a coalesced read uses: a replica, unless the client is pinned to
+    the primary or the window reaches archived history. Archived rows are
+    deleted on the primary before they are published, so a lagging replica
+    could still hold them and count them twice.
+    """
+    from datetime import timedelta
+
+    if reads_pinned_to_primary(request):
+        return "primary"
+    if days is not None and flight_archive.covers(datetime.utcnow() - timedelta(days=days)):
+        return "primary"
+    return "replica"
+
+def _in_read_session(fn, target: str, *args, **kwargs):
+    """
+    Run a coalesced computation in its own session rather than the leader's,
+    so it survives the leader disconnecting while others still await it
+    """
+    db = open_read_session(primary=target == "primary")
+    try:
+        return fn(db, *args, **kwargs)
+    finally:
+        db.close()
+
 @app.get("/api/v1/metrics/summary")
 async def get_metrics_summary(
+    request: Request,
     unit_id: str = None,
-    days: int = 30,
-    db: Session = Depends(get_db)
+    days: int = 30
 ):
     """Get risk metrics summary for dashboard"""
+    target = _read_target(request, days)
+    key = request_key("metrics/summary", scope=unit_id or "*", target=target, days=days)
+    return await metrics_flight.do(key, _in_read_session, _metrics_summary, target, unit_id, days)
+
+def _metrics_summary(db: Session, unit_id: str, days: int) -> dict:
+    """Compute the metrics summary (runs once per coalesced group of requests)"""
     from datetime import timedelta
 
     # Calculate date range
@@ -150,6 +231,25 @@ async def get_metrics_summary(
 
     # Calculate metrics
     total_flights = len(flights)
+    risk_distribution = {"low": 0, "medium": 0, "high": 0, "extreme": 0}
+    total_risk_score = 0
+    approved_count = 0
+
+    for flight in flights:
+        risk_distribution[flight.risk_tier.value] += 1
+        total_risk_score += flight.total_risk_score
+        if flight.is_approved:
+            approved_count += 1
+
+    # Union archived history when the window reaches past the hot tables
+    if flight_archive.covers(start_date):
+        archived = flight_archive.flight_summary(unit_id, start_date, end_date)
+        total_flights += archived["total_flights"]
+        total_risk_score += archived["total_risk_score"]
+        approved_count += archived["approved_count"]
+        for tier, count in archived["risk_distribution"].items():
+            risk_distribution[tier] += count
+
     if total_flights == 0:
         return {
             "data": {
@@ -161,16 +261,6 @@ async def get_metrics_summary(
             "timestamp": datetime.utcnow().isoformat()
         }
 
-    risk_distribution = {"low": 0, "medium": 0, "high": 0, "extreme": 0}
-    total_risk_score = 0
-    approved_count = 0
-
-    for flight in flights:
-        risk_distribution[flight.risk_tier.value] += 1
-        total_risk_score += flight.total_risk_score
-        if flight.is_approved:
-            approved_count += 1
-
     return {
         "data": {
             "total_flights": total_flights,
@@ -186,13 +276,167 @@ async def get_metrics_summary(
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/api/v1/metrics/crew")
+async def get_crew_metrics(
+    request: Request,
+    unit_id: str = None,
+    days: int = 30
+):
+    """Get crew risk aggregated by position and risk level"""
+    target = _read_target(request, days)
+    key = request_key("metrics/crew", scope=unit_id or "*", target=target, days=days)
+    return await metrics_flight.do(key, _in_read_session, _crew_metrics, target, unit_id, days)
+
+def _crew_metrics(db: Session, unit_id: str, days: int) -> dict:
+    """
+    Compute crew risk metrics with grouped queries only.
+    Crew names are PII and are never selected here.
+    """
+    from datetime import timedelta
+    from sqlalchemy import func
+
+    # Calculate date range
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+
+    # Crew risk by position and risk level
+    crew_query = db.query(
+        CrewMember.position,
+        CrewMember.risk_level,
+        func.count().label('count'),
+        func.sum(CrewMember.total_score).label('score_sum')
+    ).join(Flight, CrewMember.flight_id == Flight.id).filter(
+        Flight.flight_date >= start_date,
+        Flight.flight_date <= end_date
+    )
+
+    # Flight-level average crew risk
+    flight_query = db.query(
+        Flight.average_crew_risk,
+        func.count().label('count')
+    ).filter(
+        Flight.flight_date >= start_date,
+        Flight.flight_date <= end_date
+    )
+
+    if unit_id:
+        crew_query = crew_query.filter(Flight.unit_id == unit_id)
+        flight_query = flight_query.filter(Flight.unit_id == unit_id)
+
+    crew_results = [
+        (position, risk_level.value if risk_level else "low", count, score_sum)
+        for position, risk_level, count, score_sum in crew_query.group_by(CrewMember.position, CrewMember.risk_level)
+    ]
+    flight_results = [
+        (risk_level.value if risk_level else "low", count)
+        for risk_level, count in flight_query.group_by(Flight.average_crew_risk)
+    ]
+
+    # Union archived history when the window reaches past the hot tables
+    if flight_archive.covers(start_date):
+        archived = flight_archive.crew_summary(unit_id, start_date, end_date)
+        crew_results += archived["groups"]
+        flight_results += list(archived["average_crew_risk"].items())
+
+    # Aggregate data by position
+    position_data = {}
+    risk_distribution = {"low": 0, "medium": 0, "high": 0, "extreme": 0}
+    total_crew = 0
+    for position, risk_key, count, score_sum in crew_results:
+        position = position or "Unknown"
+        if position not in position_data:
+            position_data[position] = {
+                "position": position,
+                "low": 0,
+                "medium": 0,
+                "high": 0,
+                "extreme": 0,
+                "total": 0,
+                "_score_sum": 0.0
+            }
+
+        position_data[position][risk_key] += count
+        position_data[position]["total"] += count
+        position_data[position]["_score_sum"] += score_sum or 0
+        risk_distribution[risk_key] += count
+        total_crew += count
+
+    by_position = []
+    for entry in position_data.values():
+        score_sum = entry.pop("_score_sum")
+        entry["average_score"] = round(score_sum / entry["total"], 2) if entry["total"] else 0
+        by_position.append(entry)
+    by_position.sort(key=lambda x: x["total"], reverse=True)
+
+    average_crew_risk = {"low": 0, "medium": 0, "high": 0, "extreme": 0}
+    for risk_key, count in flight_results:
+        average_crew_risk[risk_key] += count
+
+    return {
+        "data": {
+            "total_crew": total_crew,
+            "risk_distribution": risk_distribution,
+            "by_position": by_position,
+            "average_crew_risk": average_crew_risk
+        },
+        "date_range": {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "days": days
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/api/v1/metrics/distribution")
+async def get_metrics_distribution(
+    unit_id: str = None,
+    days: int = 30,
+    bins: int = 10,
+    upper: int = 50
+):
+    """
+    Get histogram and p50/p90/p99 of flight and crew risk scores
+    Uses the primary because the SQLite fallback stores per-day sketches
+    """
+    from datetime import timedelta
+    from .risk_distribution import get_risk_distribution
+
+    if bins < 1 or bins > 100 or upper < 1:
+        raise HTTPException(status_code=400, detail="bins must be 1-100 and upper must be positive")
+
+    # Calculate date range
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+
+    key = request_key("metrics/distribution", scope=unit_id or "*", target="primary", days=days, bins=bins, upper=upper)
+    distribution = await metrics_flight.do(
+        key, _in_read_session, get_risk_distribution, "primary",
+        start_date, end_date, unit_id=unit_id, bins=bins, upper=upper
+    )
+
+    return {
+        "data": distribution,
+        "date_range": {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "days": days
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
 @app.get("/api/v1/risk-factors")
 async def get_risk_factors(
+    request: Request,
     unit_id: str = None,
-    days: int = 30,
-    db: Session = Depends(get_db)
+    days: int = 30
 ):
     """Get aggregated risk factor statistics for histogram"""
+    target = _read_target(request, days)
+    key = request_key("risk-factors", scope=unit_id or "*", target=target, days=days)
+    return await metrics_flight.do(key, _in_read_session, _risk_factors, target, unit_id, days)
+
+def _risk_factors(db: Session, unit_id: str, days: int) -> dict:
+    """Compute risk factor statistics (runs once per coalesced group of requests)"""
     from datetime import timedelta
     from sqlalchemy import func
 
@@ -218,10 +462,15 @@ async def get_risk_factors(
         FlightHazard.hazard_name,
         FlightHazard.selected_severity
     ).all()
+    results = [(name, severity.value if severity else "low", count) for name, severity, count in results]
+
+    # Union archived history when the window reaches past the hot tables
+    if flight_archive.covers(start_date):
+        results += flight_archive.hazard_counts(unit_id, start_date, end_date)
 
     # Aggregate data by risk factor
     risk_factor_data = {}
-    for hazard_name, severity, count in results:
+    for hazard_name, severity_key, count in results:
         if hazard_name not in risk_factor_data:
             risk_factor_data[hazard_name] = {
                 "riskFactor": hazard_name,
@@ -232,7 +481,6 @@ async def get_risk_factors(
                 "total": 0
             }
 
-        severity_key = severity.value if severity else "low"
         risk_factor_data[hazard_name][severity_key] += count
         risk_factor_data[hazard_name]["total"] += count
 
@@ -251,15 +499,202 @@ async def get_risk_factors(
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/api/v1/analytics/hazard-cooccurrence")
+async def get_hazard_cooccurrence(
+    request: Request,
+    unit_id: str = None,
+    days: int = 30,
+    high_risk_only: bool = False,
+    min_support: int = 2,
+    top: int = 50,
+    min_severity: str = "medium"
+):
+    """
+    Get hazards that tend to appear together and their correlation with risk score
+    A hazard counts as present on a flight when rated at least min_severity
+    """
+    from datetime import timedelta
+    from .hazard_analytics import get_hazard_cooccurrence as compute_hazard_cooccurrence
+
+    try:
+        severity = SeverityLevel(min_severity)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"min_severity must be one of {[s.value for s in SeverityLevel]}")
+
+    # Calculate date range
+    end_date = datetime.utcnow()
+    start_date = end_date - timedelta(days=days)
+
+    min_support = max(min_support, 1)
+    top = min(max(top, 1), 500)
+    target = _read_target(request, days)
+    key = request_key(
+        "analytics/hazard-cooccurrence",
+        scope=unit_id or "*",
+        target=target,
+        days=days,
+        high_risk_only=high_risk_only,
+        min_support=min_support,
+        top=top,
+        min_severity=severity.value
+    )
+    result = await metrics_flight.do(
+        key,
+        _in_read_session,
+        compute_hazard_cooccurrence,
+        target,
+        start_date,
+        end_date,
+        days,
+        unit_id=unit_id,
+        high_risk_only=high_risk_only,
+        min_support=min_support,
+        top=top,
+        min_severity=severity,
+        read_target=target
+    )
+
+    return {
+        "data": result,
+        "date_range": {
+            "start": start_date.isoformat(),
+            "end": end_date.isoformat(),
+            "days": days
+        },
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+def _require_export(user: User):
+    if not user.can_export:
+        raise HTTPException(status_code=403, detail="Export permission required")
+
+def _require_report_scope(user: User, job: dict):
+    """Non-admins may only see reports whose units are all within their unit access"""
+    if user.role == UserRole.ADMIN:
+        return
+    unit_ids = job.get("unit_ids")
+    if unit_ids is None or not set(unit_ids) <= set(user.unit_access or []):
+        raise HTTPException(status_code=403, detail="No access to this report's units")
+
+@app.post("/api/v1/reports")
+async def create_report(
+    unit_id: str = None,
+    days: int = 30,
+    format: str = "pdf",
+    user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Submit a background report job; unchanged periods return the cached artifact immediately"""
+    from datetime import timedelta
+    import uuid
+
+    _require_export(user)
+
+    if format not in REPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {sorted(REPORT_FORMATS)}")
+    if days < 1 or days > 366:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 366")
+
+    # Restrict the report to units the user can access
+    if user.role == UserRole.ADMIN:
+        unit_ids = [unit_id] if unit_id else None
+    elif unit_id:
+        if unit_id not in (user.unit_access or []):
+            raise HTTPException(status_code=403, detail="No access to this unit")
+        unit_ids = [unit_id]
+    else:
+        unit_ids = list(user.unit_access or [])
+
+    # Whole days so repeat requests for the same period share an artifact
+    end_day = datetime.utcnow().date()
+    start_day = end_day - timedelta(days=days - 1)
+
+    try:
+        job = report_jobs.submit(db, unit_ids, start_day, end_day, format)
+    except OverflowError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    db.add(AuditEvent(
+        id=str(uuid.uuid4()),
+        actor_id=user.id,
+        action="export",
+        target_type="report",
+        target_id=job["id"],
+        event_metadata={"format": format, "unit_ids": unit_ids, "days": days}
+    ))
+    db.commit()
+
+    return {
+        "data": job,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/api/v1/reports/{job_id}")
+async def get_report_status(
+    job_id: str,
+    user: User = Depends(get_current_user)
+):
+    """Poll a report job"""
+    _require_export(user)
+
+    job = report_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    _require_report_scope(user, job)
+
+    return {
+        "data": job,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@app.get("/api/v1/reports/{job_id}/download")
+async def download_report(
+    job_id: str,
+    user: User = Depends(get_current_user)
+):
+    """Download a finished report artifact"""
+    _require_export(user)
+
+    job = report_jobs.status(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    _require_report_scope(user, job)
+
+    artifact = report_jobs.artifact(job_id)
+    if artifact is None:
+        raise HTTPException(status_code=409, detail="Report is not ready")
+
+    path, media_type, filename = artifact
+    return FileResponse(path, media_type=media_type, filename=filename)
+
+@app.on_event("startup")
+def recover_archive():
+    """Finish or roll back archive months left behind by an interrupted run"""
+    db = SessionLocal()
+    try:
+        flight_archive.recover(db)
+    except Exception as e:
+        print(f"Archive recovery failed: {e}")
+    finally:
+        db.close()
+
+@app.on_event("shutdown")
+def shutdown_report_workers():
+    report_jobs.shutdown()
+
 @app.post("/api/v1/orm/submit")
 async def submit_orm(
     orm_data: dict,
+    response: Response,
     db: Session = Depends(get_db)
 ):
     """
     Submit ORM data from mobile app
     This is a simplified version - will be enhanced with authentication and validation
     """
+    # Keep this client's follow-up reads on the primary until replicas catch up
+    mark_primary_reads(response)
+
     return {
         "message": "ORM submission received",
         "status": "success",
@@ -7,6 +7,7 @@ from .flight import Flight, FlightHazard, CrewMember
 from .unit import Unit
 from .user import User, UserRole
 from .audit import AuditEvent
+from .analytics import RiskScoreSketch
 from .enums import SeverityLevel
 
 __all__ = [
@@ -18,5 +19,6 @@ __all__ = [
     "User",
     "UserRole",
     "AuditEvent",
+    "RiskScoreSketch",
     "SeverityLevel"
 ]
\ No newline at end of file
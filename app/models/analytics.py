@@ -0,0 +1,27 @@
+"""
+Precomputed analytics models
+"""
+
+from sqlalchemy import Column, String, Integer, Date, DateTime, JSON, Index
+from datetime import datetime
+import uuid
+
+from .base import Base
+
+class RiskScoreSketch(Base):
+    __tablename__ = "risk_score_sketches"
+
+    id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
+    scope = Column(String, nullable=False)  # Unit ID, or "*" for all units
+    metric = Column(String, nullable=False)  # flight_risk_score, crew_total_score
+    day = Column(Date, nullable=False)  # UTC day the sketch covers
+
+    # Serialized t-digest and the row count it was built from (used to detect late submissions)
+    row_count = Column(Integer, default=0)
+    sketch = Column(JSON)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_sketch_scope_metric_day', 'scope', 'metric', 'day', unique=True),
+    )
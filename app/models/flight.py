@@ -56,6 +56,7 @@ class Flight(Base):
         Index('idx_flight_unit_date', 'unit_id', 'flight_date'),
         Index('idx_flight_risk_tier', 'risk_tier'),
         Index('idx_flight_status', 'is_approved', 'is_briefed'),
+        Index('idx_flight_unit_date_crew_risk', 'unit_id', 'flight_date', 'average_crew_risk'),
     )
 
 class FlightHazard(Base):
@@ -111,4 +112,6 @@ class CrewMember(Base):
     __table_args__ = (
         Index('idx_crew_flight_id', 'flight_id'),
         Index('idx_crew_risk_level', 'risk_level'),
+        # Covers the crew metrics GROUP BY so it never touches PII columns
+        Index('idx_crew_flight_position_risk', 'flight_id', 'position', 'risk_level', 'total_score'),
     )
\ No newline at end of file
@@ -0,0 +1,436 @@
+"""
+Background report generation for ORM Dashboard API
+Export jobs render summary, trend and hazard sections from aggregate queries
+in a bounded process pool. Artifacts are stored on local disk keyed by
+(unit scope, window, data version), so unchanged periods are served from
+cache without re-rendering.
+"""
+
+from sqlalchemy import create_engine, select, func, case
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, date, timedelta
+from typing import Dict, List, Optional
+import csv
+import hashlib
+import io
+import json
+import multiprocessing
+import os
+import re
+import threading
+
+from .config import settings
+from .database import replica_pool
+from .models import Flight, FlightHazard
+from .archive import flight_archive
+
+REPORT_FORMATS = {
+    "csv": "text/csv",
+    "pdf": "application/pdf",
+}
+
+JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{40}$")
+
+def _window_filter(stmt, unit_ids: Optional[List[str]], start: datetime, end: datetime):
+    stmt = stmt.where(Flight.flight_date >= start, Flight.flight_date < end)
+    if unit_ids is not None:
+        stmt = stmt.where(Flight.unit_id.in_(unit_ids))
+    return stmt
+
+def data_version(db: Session, unit_ids: Optional[List[str]], start: datetime, end: datetime) -> str:
+    """
+    Cheap fingerprint of the flights in a window; changes when any row is
+    added or edited, or when archival moves rows into cold storage
+    """
+    count, last_edited, last_submitted = db.execute(_window_filter(
+        select(func.count(Flight.id), func.max(Flight.last_edited), func.max(Flight.submitted_at)),
+        unit_ids, start, end
+    )).one()
+    watermark = flight_archive.watermark()
+    return f"{count}:{last_edited}:{last_submitted}:{watermark.isoformat() if watermark else ''}"
+
+def build_sections(db: Session, unit_ids: Optional[List[str]], start: datetime, end: datetime) -> dict:
+    """
+    Summary, daily trend and hazard sections - aggregates only, no PII columns.
+    Archived history is unioned in when the window reaches past the hot tables.
+    """
+    archived = flight_archive.covers(start)
+
+    summary = db.execute(_window_filter(
+        select(
+            func.count(Flight.id),
+            func.sum(Flight.total_risk_score),
+            func.max(Flight.total_risk_score),
+            func.sum(case((Flight.is_approved.is_(True), 1), else_=0))
+        ),
+        unit_ids, start, end
+    )).one()
+    total_flights, risk_sum, max_risk, approved = summary
+    risk_sum, approved = risk_sum or 0, approved or 0
+
+    risk_distribution = {"low": 0, "medium": 0, "high": 0, "extreme": 0}
+    for tier, count in db.execute(
+        _window_filter(select(Flight.risk_tier, func.count(Flight.id)), unit_ids, start, end).group_by(Flight.risk_tier)
+    ):
+        risk_distribution[tier.value if tier else "low"] += count
+
+    if archived:
+        cold = flight_archive.flight_summary(unit_ids, start, end)
+        total_flights += cold["total_flights"]
+        risk_sum += cold["total_risk_score"]
+        approved += cold["approved_count"]
+        if cold["max_risk_score"] is not None:
+            max_risk = max(max_risk or 0, cold["max_risk_score"])
+        for tier, count in cold["risk_distribution"].items():
+            risk_distribution[tier] += count
+
+    day = func.date(Flight.flight_date)
+    days = {}
+    for flight_day, count, score_sum, maximum in db.execute(
+        _window_filter(
+            select(day, func.count(Flight.id), func.sum(Flight.total_risk_score), func.max(Flight.total_risk_score)),
+            unit_ids, start, end
+        ).group_by(day)
+    ):
+        days[str(flight_day)] = [count, score_sum or 0, maximum or 0]
+    if archived:
+        for flight_day, count, score_sum, maximum in flight_archive.daily_trend(unit_ids, start, end):
+            entry = days.setdefault(flight_day, [0, 0, 0])
+            entry[0] += count
+            entry[1] += score_sum or 0
+            entry[2] = max(entry[2], maximum or 0)
+    trend = [
+        {
+            "date": flight_day,
+            "flights": count,
+            "average_risk_score": round(score_sum / count, 2) if count else 0,
+            "max_risk_score": maximum
+        }
+        for flight_day, (count, score_sum, maximum) in sorted(days.items())
+    ]
+
+    hazard_groups = [
+        (hazard_name, severity.value if severity else "low", count)
+        for hazard_name, severity, count in db.execute(
+            _window_filter(
+                select(FlightHazard.hazard_name, FlightHazard.selected_severity, func.count(FlightHazard.id))
+                .join(Flight, FlightHazard.flight_id == Flight.id),
+                unit_ids, start, end
+            ).group_by(FlightHazard.hazard_name, FlightHazard.selected_severity)
+        )
+    ]
+    if archived:
+        hazard_groups += flight_archive.hazard_counts(unit_ids, start, end)
+
+    hazard_data = {}
+    for hazard_name, severity_key, count in hazard_groups:
+        entry = hazard_data.setdefault(hazard_name, {
+            "hazard": hazard_name, "low": 0, "medium": 0, "high": 0, "extreme": 0, "total": 0
+        })
+        entry[severity_key] += count
+        entry["total"] += count
+    hazards = sorted(hazard_data.values(), key=lambda x: x["total"], reverse=True)
+
+    return {
+        "summary": {
+            "total_flights": total_flights,
+            "average_risk_score": round(risk_sum / total_flights, 2) if total_flights else 0,
+            "max_risk_score": max_risk or 0,
+            "approval_rate": round(approved / total_flights * 100, 2) if total_flights else 0,
+            "risk_distribution": risk_distribution
+        },
+        "trend": trend,
+        "hazards": hazards
+    }
+
+def render_csv(sections: dict, meta: dict) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(["ORM Dashboard Report"])
+    writer.writerow(["Scope", meta["scope_label"]])
+    writer.writerow(["Window", meta["start"], meta["end"]])
+    writer.writerow([])
+
+    summary = sections["summary"]
+    writer.writerow(["Summary"])
+    writer.writerow(["total_flights", "average_risk_score", "max_risk_score", "approval_rate", "low", "medium", "high", "extreme"])
+    writer.writerow([
+        summary["total_flights"], summary["average_risk_score"], summary["max_risk_score"], summary["approval_rate"],
+        *[summary["risk_distribution"][k] for k in ("low", "medium", "high", "extreme")]
+    ])
+    writer.writerow([])
+
+    writer.writerow(["Daily Trend"])
+    writer.writerow(["date", "flights", "average_risk_score", "max_risk_score"])
+    for row in sections["trend"]:
+        writer.writerow([row["date"], row["flights"], row["average_risk_score"], row["max_risk_score"]])
+    writer.writerow([])
+
+    writer.writerow(["Hazards"])
+    writer.writerow(["hazard", "low", "medium", "high", "extreme", "total"])
+    for row in sections["hazards"]:
+        writer.writerow([row["hazard"], row["low"], row["medium"], row["high"], row["extreme"], row["total"]])
+
+    return buffer.getvalue().encode("utf-8")
+
+def render_pdf(sections: dict, meta: dict) -> bytes:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import letter
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+    styles = getSampleStyleSheet()
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.grey),
+        ("FONTSIZE", (0, 0), (-1, -1), 8),
+    ])
+
+    summary = sections["summary"]
+    story = [
+        Paragraph("ORM Dashboard Report", styles["Title"]),
+        Paragraph(f"Scope: {meta['scope_label']}", styles["Normal"]),
+        Paragraph(f"Window: {meta['start']} to {meta['end']}", styles["Normal"]),
+        Spacer(1, 12),
+        Paragraph("Summary", styles["Heading2"]),
+        Table([
+            ["Flights", "Avg risk", "Max risk", "Approval %", "Low", "Medium", "High", "Extreme"],
+            [
+                summary["total_flights"], summary["average_risk_score"], summary["max_risk_score"], summary["approval_rate"],
+                *[summary["risk_distribution"][k] for k in ("low", "medium", "high", "extreme")]
+            ]
+        ], style=table_style),
+        Spacer(1, 12),
+        Paragraph("Daily Trend", styles["Heading2"]),
+        Table(
+            [["Date", "Flights", "Avg risk", "Max risk"]]
+            + [[r["date"], r["flights"], r["average_risk_score"], r["max_risk_score"]] for r in sections["trend"]],
+            style=table_style,
+            repeatRows=1
+        ),
+        Spacer(1, 12),
+        Paragraph("Hazards", styles["Heading2"]),
+        Table(
+            [["Hazard", "Low", "Medium", "High", "Extreme", "Total"]]
+            + [[r["hazard"], r["low"], r["medium"], r["high"], r["extreme"], r["total"]] for r in sections["hazards"]],
+            style=table_style,
+            repeatRows=1
+        ),
+    ]
+
+    buffer = io.BytesIO()
+    SimpleDocTemplate(buffer, pagesize=letter, title="ORM Dashboard Report").build(story)
+    return buffer.getvalue()
+
+RENDERERS = {
+    "csv": render_csv,
+    "pdf": render_pdf,
+}
+
+def _sections_from(url: str, job: dict, require_version: bool = False) -> Optional[dict]:
+    """
+    Build the job's sections with a private engine on `url`. With
+    require_version, return None when that database's data version differs
+    from the one the job was keyed by (a lagging replica).
+    """
+    start, end = datetime.fromisoformat(job["start"]), datetime.fromisoformat(job["end"])
+    worker_engine = create_engine(url, poolclass=NullPool)
+    try:
+        with Session(worker_engine) as db:
+            if require_version and data_version(db, job["unit_ids"], start, end) != job["data_version"]:
+                return None
+            return build_sections(db, job["unit_ids"], start, end)
+    finally:
+        worker_engine.dispose()
+
+def generate_report(database_url: str, job: dict, artifact_path: str, replica_url: Optional[str] = None):
+    """
+    Process-pool entry point: query aggregates with a private engine and
+    write the artifact atomically. Sections come from the replica when it has
+    caught up with the data version computed on the primary at submission;
+    otherwise (lagging or unreachable) from the primary.
+    """
+    sections = None
+    if replica_url:
+        try:
+            sections = _sections_from(replica_url, job, require_version=True)
+        except DBAPIError:
+            sections = None
+    if sections is None:
+        sections = _sections_from(database_url, job)
+
+    content = RENDERERS[job["format"]](sections, job)
+    temp_path = f"{artifact_path}.tmp-{os.getpid()}"
+    with open(temp_path, "wb") as f:
+        f.write(content)
+    os.replace(temp_path, artifact_path)
+
+def _replica_url() -> Optional[str]:
+    """URL of the next healthy replica for a render process, or None to use the primary"""
+    replica = replica_pool.next_engine()
+    if replica is replica_pool.primary:
+        return None
+    return replica.url.render_as_string(hide_password=False)
+
+class ReportJobs:
+    """
+    Export job registry backed by a bounded process pool.
+    Job IDs are derived from (unit scope, window, format, data version), so
+    an unchanged period maps to an existing artifact and identical
+    submissions share one job. Job state lives on disk (meta, artifact and
+    error files) so any worker can report it; only in-flight futures are
+    kept in memory.
+    """
+
+    def __init__(self, report_dir: str, max_workers: int = 2, max_pending: int = 20, timeout_seconds: int = 900):
+        self.report_dir = report_dir
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout_seconds = timeout_seconds
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawn so workers never inherit the API process's connection pools
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return self._executor
+
+    def _paths(self, job_id: str):
+        base = os.path.join(self.report_dir, job_id)
+        return base, f"{base}.json"
+
+    def _error_path(self, job_id: str) -> str:
+        return os.path.join(self.report_dir, f"{job_id}.error")
+
+    def _finished(self, job_id: str, future: Future):
+        """Drop a finished future; failures are recorded on disk for status and retry"""
+        with self._lock:
+            if self._futures.get(job_id) is future:
+                del self._futures[job_id]
+        if not future.cancelled() and future.exception() is not None:
+            with open(self._error_path(job_id), "w") as f:
+                f.write(str(future.exception()) or type(future.exception()).__name__)
+
+    def submit(self, db: Session, unit_ids: Optional[List[str]], start_day: date, end_day: date, fmt: str) -> dict:
+        start = datetime.combine(start_day, datetime.min.time())
+        end = datetime.combine(end_day + timedelta(days=1), datetime.min.time())
+        version = data_version(db, unit_ids, start, end)
+
+        scope = sorted(unit_ids) if unit_ids is not None else None
+        key = json.dumps([scope, start_day.isoformat(), end_day.isoformat(), fmt, version])
+        job_id = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        artifact_path, meta_path = self._paths(job_id)
+
+        job = {
+            "id": job_id,
+            "format": fmt,
+            "unit_ids": scope,
+            "scope_label": ", ".join(scope) if scope is not None else "All units",
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "data_version": version,
+            "created_at": datetime.utcnow().isoformat()
+        }
+
+        with self._lock:
+            current = self.status(job_id)
+            # Failed and timed-out jobs are resubmitted; anything else is shared
+            if current is not None and current["status"] != "failed":
+                return current
+
+            if len(self._futures) >= self.max_pending:
+                raise OverflowError("Too many report jobs in progress")
+
+            os.makedirs(self.report_dir, exist_ok=True)
+            if os.path.exists(self._error_path(job_id)):
+                os.remove(self._error_path(job_id))
+
+            args = (generate_report, settings.database_url, job, artifact_path, _replica_url())
+            try:
+                try:
+                    future = self._pool().submit(*args)
+                except BrokenProcessPool:
+                    # A render process died (e.g. OOM-killed); replace the pool once
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                    future = self._pool().submit(*args)
+            except Exception as exc:
+                # Never leave meta without a queued job: record the failure so
+                # status reports it and the next submit retries
+                with open(self._error_path(job_id), "w") as f:
+                    f.write(str(exc) or type(exc).__name__)
+                future = None
+            else:
+                self._futures[job_id] = future
+            with open(meta_path, "w") as f:
+                json.dump(job, f)
+        if future is not None:
+            future.add_done_callback(lambda done: self._finished(job_id, done))
+
+        return self.status(job_id)
+
+    def _meta(self, job_id: str) -> Optional[dict]:
+        _, meta_path = self._paths(job_id)
+        try:
+            with open(meta_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def status(self, job_id: str) -> Optional[dict]:
+        if not JOB_ID_PATTERN.match(job_id):
+            return None
+        meta = self._meta(job_id)
+        if meta is None:
+            return None
+
+        artifact_path, _ = self._paths(job_id)
+        future = self._futures.get(job_id)
+        if os.path.exists(artifact_path):
+            status, error = "complete", None
+        elif future is not None and not future.done():
+            status, error = ("running" if future.running() else "queued"), None
+        elif future is not None and not future.cancelled() and future.exception() is not None:
+            status, error = "failed", str(future.exception())
+        elif os.path.exists(self._error_path(job_id)):
+            with open(self._error_path(job_id)) as f:
+                status, error = "failed", f.read()
+        elif datetime.utcnow() - datetime.fromisoformat(meta["created_at"]) > timedelta(seconds=self.timeout_seconds):
+            # The worker that ran it died or restarted before writing the artifact
+            status, error = "failed", "Report job did not finish; submit it again"
+        else:
+            # Submitted by another worker; the artifact will appear when done
+            status, error = "pending", None
+
+        meta.update({"status": status, "error": error})
+        return meta
+
+    def artifact(self, job_id: str) -> Optional[tuple]:
+        """Return (path, media type, download filename) for a finished job"""
+        status = self.status(job_id)
+        if status is None or status["status"] != "complete":
+            return None
+        artifact_path, _ = self._paths(job_id)
+        filename = f"orm-report-{status['start'][:10]}-{status['end'][:10]}.{status['format']}"
+        return artifact_path, REPORT_FORMATS[status["format"]], filename
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+report_jobs = ReportJobs(
+    settings.report_dir,
+    max_workers=settings.report_workers,
+    max_pending=settings.report_max_pending,
+    timeout_seconds=settings.report_job_timeout_seconds
+)
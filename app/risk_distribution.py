@@ -0,0 +1,264 @@
+"""
+Risk score distribution analytics for ORM Dashboard API
+Fixed-bin histograms and p50/p90/p99 of flight and crew risk scores.
+PostgreSQL computes these in the database (percentile_cont, width_bucket);
+other databases, and windows reaching into archived history, use stored,
+mergeable per-day t-digests.
+"""
+
+from sqlalchemy import select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from datetime import datetime, date, timedelta
+from itertools import groupby
+from typing import Optional
+import math
+
+from .models import Flight, CrewMember, RiskScoreSketch
+from .tdigest import TDigest
+from .archive import flight_archive
+
+PERCENTILES = (0.5, 0.9, 0.99)
+
+# Metric name -> score column; crew scores are scoped through their flight
+METRICS = {
+    "flight_risk_score": Flight.total_risk_score,
+    "crew_total_score": CrewMember.total_score,
+}
+
+# Metric name -> (archived table, column) in cold storage
+ARCHIVED_METRICS = {
+    "flight_risk_score": ("flights", "total_risk_score"),
+    "crew_total_score": ("crew_members", "total_score"),
+}
+
+STREAM_CHUNK_SIZE = 10000
+
+def _scoped(stmt, metric: str, unit_id: Optional[str], start: datetime, end: datetime):
+    """Apply the join, unit scope and date window shared by every query"""
+    if metric == "crew_total_score":
+        stmt = stmt.select_from(CrewMember).join(Flight, CrewMember.flight_id == Flight.id)
+    else:
+        stmt = stmt.select_from(Flight)
+
+    stmt = stmt.where(
+        Flight.flight_date >= start,
+        Flight.flight_date < end,
+        METRICS[metric].isnot(None)
+    )
+
+    if unit_id:
+        stmt = stmt.where(Flight.unit_id == unit_id)
+
+    return stmt
+
+def _bin_edges(bins: int, upper: int) -> list:
+    width = upper / bins
+    return [round(i * width, 4) for i in range(bins + 1)]
+
+def _histogram(counts: list, edges: list) -> list:
+    """Shape bucket counts (one per bin plus overflow) for the response"""
+    histogram = [
+        {"lower": edges[i], "upper": edges[i + 1], "count": int(counts[i])}
+        for i in range(len(edges) - 1)
+    ]
+    histogram.append({"lower": edges[-1], "upper": None, "count": int(counts[-1])})
+    return histogram
+
+def _postgres_distribution(db: Session, metric, unit_id, start, end, bins, upper) -> dict:
+    score = METRICS[metric]
+
+    stats = db.execute(_scoped(
+        select(
+            func.count(score),
+            func.min(score),
+            func.max(score),
+            *[func.percentile_cont(q).within_group(score) for q in PERCENTILES]
+        ),
+        metric, unit_id, start, end
+    )).one()
+
+    # width_bucket returns 0 below the range and bins + 1 at or above it
+    bucket = func.width_bucket(score, 0, upper, bins).label("bucket")
+    counts = [0] * (bins + 1)
+    for bucket_number, count in db.execute(
+        _scoped(select(bucket, func.count()), metric, unit_id, start, end).group_by(bucket)
+    ):
+        counts[min(max(bucket_number, 1), bins + 1) - 1] += count
+
+    total, minimum, maximum, *percentiles = stats
+    return {
+        "count": total,
+        "min": minimum,
+        "max": maximum,
+        "percentiles": _percentile_dict(percentiles),
+        "histogram": _histogram(counts, _bin_edges(bins, upper)),
+        "approximate": False
+    }
+
+def _percentile_dict(values) -> dict:
+    return {
+        f"p{int(q * 100)}": round(float(v), 2) if v is not None else None
+        for q, v in zip(PERCENTILES, values)
+    }
+
+def _digest_for_range(db: Session, metric, unit_id, start, end) -> TDigest:
+    """Build a digest by streaming raw scores for a (partial-day) range"""
+    digest = TDigest()
+    result = db.execute(
+        _scoped(select(METRICS[metric]), metric, unit_id, start, end).execution_options(yield_per=STREAM_CHUNK_SIZE)
+    )
+    for chunk in result.partitions():
+        digest.update(score for (score,) in chunk)
+
+    if flight_archive.covers(start):
+        table, column = ARCHIVED_METRICS[metric]
+        digest.update(flight_archive.column_values(table, column, unit_id, start, end))
+    return digest
+
+def _sketch_is_fresh(row: RiskScoreSketch, live_count: int, last_edited: Optional[datetime]) -> bool:
+    """A stored day sketch is reusable while no row was added, removed or edited since it was built"""
+    if row.row_count != live_count:
+        return False
+    return last_edited is None or row.updated_at is None or last_edited <= row.updated_at
+
+def _day_digests(db: Session, metric, unit_id, first_day: date, last_day: date) -> list:
+    """
+    Return stored digests for whole days in [first_day, last_day], rebuilding
+    any day that is missing, whose row count changed, or that holds a flight
+    edited (last_edited) after the sketch was stored
+    """
+    scope = unit_id or "*"
+    start = datetime.combine(first_day, datetime.min.time())
+    end = datetime.combine(last_day + timedelta(days=1), datetime.min.time())
+    score = METRICS[metric]
+    day_col = func.date(Flight.flight_date)
+
+    live_days = {
+        str(day): (count, last_edited)
+        for day, count, last_edited in db.execute(
+            _scoped(select(day_col, func.count(score), func.max(Flight.last_edited)), metric, unit_id, start, end)
+            .group_by(day_col)
+        )
+    }
+
+    stored = {
+        row.day.isoformat(): row
+        for row in db.query(RiskScoreSketch).filter(
+            RiskScoreSketch.scope == scope,
+            RiskScoreSketch.metric == metric,
+            RiskScoreSketch.day >= first_day,
+            RiskScoreSketch.day <= last_day
+        )
+    }
+
+    # Archived days are frozen history: their stored sketches stay authoritative
+    # even though the raw rows have left the database
+    watermark = flight_archive.watermark()
+    archived_through = watermark.date().isoformat() if watermark else ""
+
+    digests = []
+    stale_days = set()
+    for day in sorted(set(live_days) | {d for d in stored if d <= archived_through}):
+        row = stored.get(day)
+        if row is not None and (day <= archived_through or _sketch_is_fresh(row, *live_days[day])):
+            digests.append(TDigest.from_dict(row.sketch))
+        else:
+            stale_days.add(day)
+
+    if stale_days:
+        # One ordered scan covering the stale days, split per day in Python
+        scan_start = datetime.fromisoformat(min(stale_days))
+        scan_end = datetime.fromisoformat(max(stale_days)) + timedelta(days=1)
+        rows = db.execute(
+            _scoped(select(day_col, score), metric, unit_id, scan_start, scan_end)
+            .order_by(day_col)
+            .execution_options(yield_per=STREAM_CHUNK_SIZE)
+        )
+        for day, day_rows in groupby(rows, key=lambda r: str(r[0])):
+            if day not in stale_days:
+                continue
+            digest = TDigest()
+            digest.update(row[1] for row in day_rows)
+            digests.append(digest)
+
+            sketch = stored.get(day) or RiskScoreSketch(scope=scope, metric=metric, day=date.fromisoformat(day))
+            sketch.row_count = int(digest.count)
+            sketch.sketch = digest.to_dict()
+            db.add(sketch)
+
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent request stored the same day first; its sketch is equivalent
+            db.rollback()
+
+    return digests
+
+def _sketch_distribution(db: Session, metric, unit_id, start, end, bins, upper) -> dict:
+    # Whole days come from stored sketches; the partial edges are scanned raw
+    first_full_day = (start + timedelta(days=1)).date() if start.time() != datetime.min.time() else start.date()
+    today = end.date()
+    merged = TDigest()
+
+    if first_full_day < today:
+        for digest in _day_digests(db, metric, unit_id, first_full_day, today - timedelta(days=1)):
+            merged.merge(digest)
+        ranges = [
+            (start, datetime.combine(first_full_day, datetime.min.time())),
+            (datetime.combine(today, datetime.min.time()), end)
+        ]
+    else:
+        ranges = [(start, end)]
+
+    for range_start, range_end in ranges:
+        if range_start < range_end:
+            merged.merge(_digest_for_range(db, metric, unit_id, range_start, range_end))
+
+    edges_list = _bin_edges(bins, upper)
+    total = int(merged.count)
+    counts = [0] * (bins + 1)
+    if total:
+        # Scores are integers, so the values below an edge are those up to
+        # ceil(edge) - 1; evaluate the CDF half a point above that. Cumulative
+        # rounding keeps the bins summing to the total
+        cumulative = [0] + [round(merged.cdf(math.ceil(edge) - 0.5) * total) for edge in edges_list[1:]] + [total]
+        counts = [cumulative[i + 1] - cumulative[i] for i in range(bins + 1)]
+
+    return {
+        "count": total,
+        "min": merged.min,
+        "max": merged.max,
+        "percentiles": _percentile_dict([merged.quantile(q) for q in PERCENTILES]),
+        "histogram": _histogram(counts, edges_list),
+        "approximate": True
+    }
+
+def materialize_sketches(db: Session, first_day: date, last_day: date, unit_ids: list):
+    """
+    Store per-day sketches for every metric and scope ("*" plus each unit),
+    e.g. before the raw rows are archived
+    """
+    for metric in METRICS:
+        for unit_id in [None, *unit_ids]:
+            _day_digests(db, metric, unit_id, first_day, last_day)
+
+def get_risk_distribution(
+    db: Session,
+    start_date: datetime,
+    end_date: datetime,
+    unit_id: Optional[str] = None,
+    bins: int = 10,
+    upper: int = 50
+) -> dict:
+    """Distribution of flight and crew risk scores for a unit scope and window"""
+    # Archived history only exists as stored sketches, so those windows always merge sketches
+    if db.get_bind().dialect.name == "postgresql" and not flight_archive.covers(start_date):
+        compute = _postgres_distribution
+    else:
+        compute = _sketch_distribution
+
+    return {
+        metric: compute(db, metric, unit_id, start_date, end_date, bins, upper)
+        for metric in METRICS
+    }
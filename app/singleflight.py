@@ -0,0 +1,63 @@
+"""
+Request coalescing (single-flight) for ORM Dashboard API
+Concurrent identical requests share one in-flight computation and its result
+"""
+
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Callable, Dict, Hashable
+import asyncio
+
+class SingleFlight:
+    """
+    Per-worker single-flight group.
+    The first request for a key runs the (blocking) computation in the
+    threadpool; identical requests arriving while it runs await the same
+    task instead of issuing their own queries. Only in-flight work is
+    shared - nothing is cached once the computation finishes.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable, *args, **kwargs) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            self.executed += 1
+            task = asyncio.ensure_future(run_in_threadpool(fn, *args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+
+        # Shield so a disconnecting client does not cancel work others are awaiting
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            # Mark the exception retrieved even if every waiter went away
+            task.exception()
+
+    def stats(self) -> dict:
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._inflight),
+            "coalesce_rate": round(self.coalesced / total * 100, 2) if total else 0
+        }
+
+def request_key(route: str, scope: Any = None, target: str = "replica", **params) -> tuple:
+    """
+    Build a coalescing key from the route, the caller's permission scope, the
+    database the computation reads from ("primary" or "replica") and the
+    parsed (already type-normalized) query parameters.
+    A client pinned to the primary never joins a flight reading a lagging replica.
+    """
+    return (route, scope, target, tuple(sorted(params.items())))
+
+# Shared group for metric endpoints in this worker
+metrics_flight = SingleFlight()
@@ -0,0 +1,154 @@
+"""
+Merging t-digest for approximate quantiles
+Used where the database cannot compute percentiles itself (SQLite). Digests
+are JSON-serializable and mergeable, so per-day digests can be stored and
+combined for long windows without rescanning raw rows.
+"""
+
+from bisect import bisect_left
+from typing import Iterable, List, Optional
+import math
+
+class TDigest:
+    """
+    Compact quantile sketch made of weighted centroids.
+    Centroids are sized by the k1 scale function, so accuracy is highest at
+    the tails (p90/p99) where the dashboard needs it.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.means: List[float] = []
+        self.weights: List[float] = []
+        self.count = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._buffer: List[tuple] = []
+
+    def add(self, value: float, weight: float = 1.0):
+        if value is None:
+            return
+        value = float(value)
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def update(self, values: Iterable[float]):
+        for value in values:
+            self.add(value)
+
+    def merge(self, other: "TDigest"):
+        """Fold another digest into this one"""
+        other._compress()
+        if not other.count:
+            return
+        self._buffer.extend(zip(other.means, other.weights))
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inverse(self, k: float) -> float:
+        return (math.sin(min(k * 2 * math.pi / self.compression, math.pi / 2)) + 1) / 2
+
+    def _compress(self):
+        if not self._buffer:
+            return
+        items = sorted(list(zip(self.means, self.weights)) + self._buffer)
+        self._buffer = []
+
+        means, weights = [], []
+        cur_mean, cur_weight = items[0]
+        weight_so_far = 0.0
+        q_limit = self._k_inverse(self._k(0.0) + 1)
+        for mean, weight in items[1:]:
+            if (weight_so_far + cur_weight + weight) / self.count <= q_limit:
+                cur_mean += (mean - cur_mean) * weight / (cur_weight + weight)
+                cur_weight += weight
+            else:
+                means.append(cur_mean)
+                weights.append(cur_weight)
+                weight_so_far += cur_weight
+                q_limit = self._k_inverse(self._k(weight_so_far / self.count) + 1)
+                cur_mean, cur_weight = mean, weight
+        means.append(cur_mean)
+        weights.append(cur_weight)
+
+        self.means, self.weights = means, weights
+
+    def _centers(self) -> List[float]:
+        """Cumulative weight at each centroid's center"""
+        centers, cumulative = [], 0.0
+        for weight in self.weights:
+            centers.append(cumulative + weight / 2)
+            cumulative += weight
+        return centers
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.count:
+            return None
+        if len(self.means) == 1:
+            return self.means[0]
+
+        target = min(max(q, 0.0), 1.0) * self.count
+        centers = self._centers()
+        if target <= centers[0]:
+            return _interpolate(0.0, self.min, centers[0], self.means[0], target)
+        if target >= centers[-1]:
+            return _interpolate(centers[-1], self.means[-1], self.count, self.max, target)
+
+        i = bisect_left(centers, target)
+        return _interpolate(centers[i - 1], self.means[i - 1], centers[i], self.means[i], target)
+
+    def cdf(self, x: float) -> float:
+        """Approximate fraction of values <= x"""
+        self._compress()
+        if not self.count or x < self.min:
+            return 0.0
+        if x >= self.max:
+            return 1.0
+        if len(self.means) == 1:
+            return 0.5
+
+        centers = self._centers()
+        if x <= self.means[0]:
+            rank = _interpolate(self.min, 0.0, self.means[0], centers[0], x)
+        elif x >= self.means[-1]:
+            rank = _interpolate(self.means[-1], centers[-1], self.max, self.count, x)
+        else:
+            i = bisect_left(self.means, x)
+            rank = _interpolate(self.means[i - 1], centers[i - 1], self.means[i], centers[i], x)
+        return rank / self.count
+
+    def to_dict(self) -> dict:
+        self._compress()
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "centroids": [[m, w] for m, w in zip(self.means, self.weights)]
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "TDigest":
+        digest = cls(compression=data.get("compression", 100))
+        digest.count = data.get("count", 0.0)
+        digest.min = data.get("min")
+        digest.max = data.get("max")
+        centroids = data.get("centroids") or []
+        digest.means = [float(m) for m, _ in centroids]
+        digest.weights = [float(w) for _, w in centroids]
+        return digest
+
+def _interpolate(x0: float, y0: float, x1: float, y1: float, x: float) -> float:
+    if x1 == x0:
+        return y0
+    return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Cold-storage archival for ORM Dashboard API
+Moves scrubbed flights older than the hot window into compressed,
+date-partitioned Parquet files that the metrics endpoints read transparently
+
+Usage: python archive_flights.py [--older-than-days N] [--dry-run]
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Add the app directory to Python path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Flight, Unit
+from app.archive import flight_archive
+from app.risk_distribution import materialize_sketches
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old scrubbed flights to Parquet")
+    parser.add_argument("--older-than-days", type=int, default=settings.archive_after_days,
+                        help=f"Archive flights older than this many days (default {settings.archive_after_days})")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be archived")
+    args = parser.parse_args()
+
+    print(f"🗄️  Archiving scrubbed flights older than {args.older_than_days} days to {settings.archive_dir}...")
+
+    db = SessionLocal()
+    try:
+        cutoff = datetime.utcnow() - timedelta(days=args.older_than_days)
+        oldest = db.query(Flight.flight_date).filter(
+            Flight.flight_date < cutoff,
+            Flight.is_pii_scrubbed.is_(True)
+        ).order_by(Flight.flight_date).first()
+
+        if oldest is not None and not args.dry_run:
+            # Keep distribution history: store per-day sketches before raw rows leave the database
+            print("📊 Materializing risk score sketches for archived days...")
+            unit_ids = [unit_id for (unit_id,) in db.query(Unit.id)]
+            materialize_sketches(db, oldest[0].date(), cutoff.date() - timedelta(days=1), unit_ids)
+
+        result = flight_archive.archive(db, args.older_than_days, dry_run=args.dry_run)
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Error archiving flights: {e}")
+        raise
+    finally:
+        db.close()
+
+    recovered = result.get("recovered", {})
+    if recovered.get("published") or recovered.get("discarded"):
+        print(f"♻️  Recovered interrupted months: {len(recovered['published'])} published, "
+              f"{len(recovered['discarded'])} rolled back")
+
+    if args.dry_run:
+        print(f"🔎 Dry run: {result['flights']} flights before {result['cutoff']} would be archived")
+    else:
+        print(f"✅ Archived {result['flights']} flights before {result['cutoff']} "
+              f"({len(result['months'])} months: {', '.join(result['months']) or 'none'})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Benchmark for hazard co-occurrence analytics
+Generates synthetic flight_hazards rows, then times the streaming-side
+factorization and the NumPy/SciPy computation separately
+
+Usage: python benchmarks/bench_hazard_cooccurrence.py [rows]
+"""
+
+import os
+import sys
+import time
+import uuid
+
+import numpy as np
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.hazard_analytics import compute_cooccurrence, encode_hazard_rows, STREAM_CHUNK_SIZE
+from app.models import SeverityLevel
+
+HAZARDS_PER_FLIGHT = 12
+HAZARD_CATALOG = 80
+
+def generate_rows(total_rows: int, seed: int = 42):
+    """Build (flight_id, hazard_name, severity, total_risk_score) rows like the streamed query"""
+    rng = np.random.default_rng(seed)
+    n_flights = total_rows // HAZARDS_PER_FLIGHT
+
+    flight_labels = np.array([str(uuid.UUID(int=int(i))) for i in rng.integers(0, 2**63, n_flights)], dtype=object)
+    hazard_labels = np.array([f"Hazard {i:03d}" for i in range(HAZARD_CATALOG)], dtype=object)
+
+    flight_codes = np.repeat(np.arange(n_flights), HAZARDS_PER_FLIGHT)
+    # Skewed hazard popularity so some pairs co-occur far more than others
+    hazard_codes = rng.zipf(1.3, flight_codes.size) % HAZARD_CATALOG
+    severity_levels = np.array(list(SeverityLevel), dtype=object)
+    severities = severity_levels[rng.integers(0, 4, flight_codes.size)]
+    flight_scores = rng.integers(0, 40, n_flights)
+
+    return list(zip(
+        flight_labels[flight_codes],
+        hazard_labels[hazard_codes],
+        severities,
+        flight_scores[flight_codes].tolist()
+    ))
+
+def main():
+    total_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print(f"Generating {total_rows:,} hazard rows...")
+    rows = generate_rows(total_rows)
+
+    started = time.perf_counter()
+    chunks = (rows[i:i + STREAM_CHUNK_SIZE] for i in range(0, len(rows), STREAM_CHUNK_SIZE))
+    columns = encode_hazard_rows(chunks)
+    print(f"encode_hazard_rows (streaming side): {time.perf_counter() - started:.3f}s")
+
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        result = compute_cooccurrence(*columns, min_support=2, top=50)
+        timings.append(time.perf_counter() - started)
+
+    print(f"Flights: {result['total_flights']:,}  Hazards: {len(result['hazards'])}  Pairs returned: {len(result['pairs'])}")
+    print(f"compute_cooccurrence: best {min(timings):.3f}s  mean {sum(timings) / len(timings):.3f}s")
+
+if __name__ == "__main__":
+    main()
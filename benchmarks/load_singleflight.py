@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Load test for metric request coalescing
+Fires concurrent identical requests at the metric endpoints against a
+throwaway SQLite database and counts the aggregation queries that reach it
+
+Usage: python benchmarks/load_singleflight.py [concurrency] [flights]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+# Point the app at a throwaway database before it is imported
+DB_PATH = os.path.join(tempfile.mkdtemp(), "load_singleflight.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{DB_PATH}"
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+
+# Add the project root to Python path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from sqlalchemy import event
+
+from app.main import app
+from app.database import SessionLocal, engine
+from app.models import Flight, FlightHazard, SeverityLevel, Unit
+from app.singleflight import metrics_flight
+
+def seed(total_flights: int):
+    """Insert enough flights that each aggregation takes measurable time"""
+    db = SessionLocal()
+    try:
+        db.add(Unit(id="load_unit", name="Load Test Unit"))
+        now = datetime.utcnow()
+        tiers = list(SeverityLevel)
+        for i in range(total_flights):
+            flight = Flight(
+                unit_id="load_unit",
+                flight_date=now - timedelta(hours=random.randint(1, 24 * 29)),
+                total_risk_score=random.randint(0, 40),
+                risk_tier=random.choice(tiers),
+                is_approved=random.random() < 0.9
+            )
+            flight.hazard_responses = [
+                FlightHazard(hazard_id=f"h{h}", hazard_name=f"Hazard {h}", selected_severity=random.choice(tiers))
+                for h in random.sample(range(20), 3)
+            ]
+            db.add(flight)
+        db.commit()
+    finally:
+        db.close()
+
+async def fire(path: str, concurrency: int) -> list:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load") as client:
+        return await asyncio.gather(*[client.get(path) for _ in range(concurrency)])
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    total_flights = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    print(f"Seeding {total_flights:,} flights into {DB_PATH}...")
+    seed(total_flights)
+
+    queries = []
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_queries(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            queries.append(statement)
+
+    failed = False
+    for path in ("/api/v1/metrics/summary?days=30", "/api/v1/risk-factors?days=30"):
+        queries.clear()
+        before = metrics_flight.stats()
+        responses = asyncio.run(fire(path, concurrency))
+        after = metrics_flight.stats()
+
+        statuses = {r.status_code for r in responses}
+        identical = len({r.text for r in responses}) == 1
+        coalesced = after["coalesced"] - before["coalesced"]
+        print(f"{path}: {concurrency} requests, statuses {statuses}, identical bodies {identical}, "
+              f"DB queries {len(queries)}, coalesced {coalesced}")
+        failed |= len(queries) != 1 or statuses != {200} or not identical
+
+    print("FAIL" if failed else "OK: one DB query per burst of identical requests")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""
+Shared pytest setup for ORM Dashboard API
+Points the app at throwaway storage before any app module is imported
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+TEST_ROOT = tempfile.mkdtemp(prefix="orm_dashboard_tests_")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TEST_ROOT, 'app.db')}"
+os.environ["ARCHIVE_DIR"] = os.path.join(TEST_ROOT, "archive")
+os.environ["REPORT_DIR"] = os.path.join(TEST_ROOT, "reports")
+os.environ.pop("DATABASE_REPLICA_URLS", None)
+
+# Add the project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def db(tmp_path):
+    """Session on a fresh SQLite database with every table created"""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.models import Base
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+@pytest.fixture
+def flight_archive(tmp_path, monkeypatch):
+    """Empty archive in a temp dir, swapped in for every app module that uses it"""
+    from app.archive import FlightArchive
+
+    archive = FlightArchive(str(tmp_path / "archive"))
+    for name, module in list(sys.modules.items()):
+        if name.startswith("app.") and hasattr(module, "flight_archive"):
+            monkeypatch.setattr(module, "flight_archive", archive)
+    return archive
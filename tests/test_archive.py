@@ -0,0 +1,153 @@
+"""
+Tests for the Parquet cold-storage archive
+"""
+
+import glob
+import os
+import random
+from datetime import datetime, timedelta
+
+import pyarrow.parquet as pq
+import pytest
+
+from app import main, reports
+from app.archive import FlightArchive
+from app.hazard_analytics import compute_cooccurrence, load_hazard_rows
+from app.models import CrewMember, Flight, FlightHazard, SeverityLevel, Unit
+
+def _seed(db, old=120, recent=40, seed=11):
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    for unit_id in ("u1", "u2"):
+        db.add(Unit(id=unit_id, name=unit_id.upper()))
+    levels = list(SeverityLevel)
+    for i in range(old + recent):
+        days_ago = rng.randint(200, 400) if i < old else rng.randint(1, 60)
+        flight = Flight(
+            unit_id=rng.choice(("u1", "u2")),
+            flight_date=now - timedelta(days=days_ago, minutes=rng.randint(0, 1000)),
+            total_risk_score=rng.randint(0, 45),
+            risk_tier=rng.choice(levels),
+            average_crew_risk=rng.choice(levels + [None]),
+            is_approved=rng.random() < 0.8,
+            is_pii_scrubbed=i < old
+        )
+        flight.hazard_responses = [
+            FlightHazard(hazard_id=f"h{h}", hazard_name=f"Hazard {h}", selected_severity=rng.choice(levels + [None]))
+            for h in rng.sample(range(8), rng.randint(1, 5))
+        ]
+        flight.crew_members = [
+            CrewMember(position=rng.choice(("Pilot", "Navigator", None)), total_score=rng.randint(0, 30),
+                       risk_level=rng.choice(levels))
+            for _ in range(rng.randint(1, 3))
+        ]
+        db.add(flight)
+    db.commit()
+
+def _snapshot(db, days=500, unit_id=None):
+    """Everything the archive must keep identical, minus timestamps"""
+    end = datetime.utcnow() + timedelta(minutes=1)
+    start = datetime.combine((end - timedelta(days=days)).date(), datetime.min.time())
+    sections = reports.build_sections(db, [unit_id] if unit_id else None, start, end)
+    return {
+        "summary": main._metrics_summary(db, unit_id, days)["data"] | {"date_range": None},
+        "crew": main._crew_metrics(db, unit_id, days)["data"],
+        "risk_factors": main._risk_factors(db, unit_id, days)["data"],
+        "cooccurrence": compute_cooccurrence(
+            *load_hazard_rows(db, start, end, unit_id=unit_id), min_support=1, top=1000
+        ),
+        "high_risk_cooccurrence": compute_cooccurrence(
+            *load_hazard_rows(db, start, end, unit_id=unit_id, high_risk_only=True), min_support=1, top=1000
+        ),
+        "report": sections,
+    }
+
+def _part_files(archive):
+    return sorted(glob.glob(os.path.join(archive.archive_dir, "*", "*", "part-*.parquet")))
+
+def test_round_trip_preserves_every_aggregate(db, flight_archive):
+    _seed(db)
+    before = {unit_id: _snapshot(db, unit_id=unit_id) for unit_id in (None, "u1")}
+    hot_before = db.query(Flight).count()
+
+    result = flight_archive.archive(db, older_than_days=180)
+
+    assert result["flights"] == 120
+    assert db.query(Flight).count() == hot_before - 120
+    assert db.query(FlightHazard).join(Flight).count() == db.query(FlightHazard).count()
+    assert _part_files(flight_archive)
+    assert flight_archive.covers(datetime.utcnow() - timedelta(days=500))
+    assert not flight_archive.covers(datetime.utcnow() - timedelta(days=100))
+
+    for unit_id, snapshot in before.items():
+        assert _snapshot(db, unit_id=unit_id) == snapshot
+
+def test_archived_summary_and_hazard_counts_match_source_rows(db, flight_archive):
+    _seed(db, old=60, recent=0)
+    start, end = datetime.utcnow() - timedelta(days=500), datetime.utcnow()
+    flights = db.query(Flight).filter(Flight.unit_id == "u2").all()
+    expected_tiers = {"low": 0, "medium": 0, "high": 0, "extreme": 0}
+    for flight in flights:
+        expected_tiers[flight.risk_tier.value] += 1
+    expected_hazards = {}
+    for flight in flights:
+        for hazard in flight.hazard_responses:
+            key = (hazard.hazard_name, hazard.selected_severity.value if hazard.selected_severity else "low")
+            expected_hazards[key] = expected_hazards.get(key, 0) + 1
+    expected_total = sum(f.total_risk_score for f in flights)
+
+    flight_archive.archive(db, older_than_days=180)
+
+    summary = flight_archive.flight_summary("u2", start, end)
+    assert summary["total_flights"] == len(flights)
+    assert summary["total_risk_score"] == expected_total
+    assert summary["risk_distribution"] == expected_tiers
+    assert {(name, severity): count for name, severity, count in flight_archive.hazard_counts("u2", start, end)} == expected_hazards
+    assert flight_archive.flight_summary(["u1", "u2"], start, end)["total_flights"] == 60
+
+def test_crash_after_commit_is_published_by_recovery(db, flight_archive, monkeypatch):
+    _seed(db)
+    before = _snapshot(db)
+
+    def crash(self, manifest_path, manifest):
+        raise OSError("power loss")
+
+    with monkeypatch.context() as patch, pytest.raises(OSError):
+        patch.setattr(FlightArchive, "_publish", crash)
+        flight_archive.archive(db, older_than_days=180)
+
+    # Rows left the database but nothing was published: never counted twice
+    assert _part_files(flight_archive) == []
+    assert flight_archive.watermark() is None
+    assert _snapshot(db)["summary"]["total_flights"] < before["summary"]["total_flights"]
+
+    recovered = flight_archive.recover(db)
+    assert recovered["published"] and not recovered["discarded"]
+    assert _snapshot(db) == before
+
+    # The run stopped after its first month; re-running archives the rest
+    # without writing any flight a second time
+    flight_archive.archive(db, older_than_days=180)
+    assert flight_archive.archive(db, older_than_days=180)["flights"] == 0
+    archived_ids = pq.ParquetDataset(os.path.join(flight_archive.archive_dir, "flights")).read(columns=["id"])["id"]
+    assert len(archived_ids) == len(set(archived_ids.to_pylist())) == 120
+    assert _snapshot(db) == before
+
+def test_failed_commit_leaves_rows_hot_and_nothing_published(db, flight_archive, monkeypatch):
+    _seed(db)
+    before = _snapshot(db)
+
+    def failing_commit():
+        raise RuntimeError("commit failed")
+
+    with monkeypatch.context() as patch, pytest.raises(RuntimeError):
+        patch.setattr(db, "commit", failing_commit)
+        flight_archive.archive(db, older_than_days=180)
+
+    assert _part_files(flight_archive) == []
+    assert glob.glob(os.path.join(flight_archive.archive_dir, "**", ".*.tmp"), recursive=True) == []
+    assert flight_archive.recover(db) == {"published": [], "discarded": []}
+    assert _snapshot(db) == before
+
+    assert flight_archive.archive(db, older_than_days=180)["flights"] == 120
+    assert _snapshot(db) == before
@@ -0,0 +1,95 @@
+"""
+Tests for grouped crew risk metrics
+"""
+
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.main import _crew_metrics
+from app.models import CrewMember, Flight, SeverityLevel, Unit
+
+def _flight(db, flight_id, unit_id, days_ago, crew, average_crew_risk=SeverityLevel.LOW):
+    db.add(Flight(id=flight_id, unit_id=unit_id, flight_date=datetime.utcnow() - timedelta(days=days_ago),
+                  average_crew_risk=average_crew_risk))
+    for position, risk_level, score in crew:
+        db.add(CrewMember(flight_id=flight_id, name=f"Crew {flight_id} {position}", position=position,
+                          risk_level=risk_level, total_score=score))
+    db.commit()
+
+def _seed(db):
+    db.add(Unit(id="u1", name="Unit 1"))
+    db.add(Unit(id="u2", name="Unit 2"))
+    _flight(db, "a", "u1", 2, [
+        ("Pilot", SeverityLevel.LOW, 4),
+        ("Pilot", SeverityLevel.HIGH, 14),
+        ("Navigator", SeverityLevel.MEDIUM, 9),
+    ], average_crew_risk=SeverityLevel.MEDIUM)
+    _flight(db, "b", "u1", 5, [
+        ("Pilot", SeverityLevel.LOW, 6),
+        (None, SeverityLevel.EXTREME, 20),
+    ])
+    _flight(db, "c", "u2", 3, [
+        ("Pilot", SeverityLevel.EXTREME, 22),
+        ("EWO", SeverityLevel.LOW, 3),
+    ], average_crew_risk=SeverityLevel.HIGH)
+    # Outside a 10-day window
+    _flight(db, "d", "u1", 20, [("Pilot", SeverityLevel.HIGH, 15)], average_crew_risk=SeverityLevel.EXTREME)
+
+def _positions(result):
+    return {entry["position"]: entry for entry in result["data"]["by_position"]}
+
+def test_crew_metrics_group_by_position_per_unit(db, flight_archive):
+    _seed(db)
+
+    result = _crew_metrics(db, "u1", 10)
+    data = result["data"]
+    assert data["total_crew"] == 5
+    assert data["risk_distribution"] == {"low": 2, "medium": 1, "high": 1, "extreme": 1}
+    assert data["average_crew_risk"] == {"low": 1, "medium": 1, "high": 0, "extreme": 0}
+
+    positions = _positions(result)
+    assert positions["Pilot"] == {
+        "position": "Pilot", "low": 2, "medium": 0, "high": 1, "extreme": 0, "total": 3, "average_score": 8.0
+    }
+    assert positions["Navigator"]["total"] == 1 and positions["Navigator"]["average_score"] == 9.0
+    assert positions["Unknown"]["extreme"] == 1 and positions["Unknown"]["average_score"] == 20.0
+    assert [entry["position"] for entry in data["by_position"]][0] == "Pilot"
+
+    other = _crew_metrics(db, "u2", 10)
+    assert other["data"]["total_crew"] == 2
+    assert _positions(other)["Pilot"]["average_score"] == 22.0
+    assert other["data"]["average_crew_risk"] == {"low": 0, "medium": 0, "high": 1, "extreme": 0}
+
+def test_crew_metrics_follow_the_window_across_units(db, flight_archive):
+    _seed(db)
+
+    recent = _crew_metrics(db, None, 4)["data"]
+    assert recent["total_crew"] == 5
+    assert recent["average_crew_risk"] == {"low": 0, "medium": 1, "high": 1, "extreme": 0}
+
+    month = _crew_metrics(db, None, 30)
+    assert month["data"]["total_crew"] == 8
+    assert month["data"]["average_crew_risk"] == {"low": 1, "medium": 1, "high": 1, "extreme": 1}
+    pilots = _positions(month)["Pilot"]
+    assert (pilots["total"], pilots["average_score"]) == (5, round((4 + 14 + 6 + 22 + 15) / 5, 2))
+
+def test_crew_metrics_never_select_crew_names(db, flight_archive):
+    _seed(db)
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        _crew_metrics(db, "u1", 10)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    crew_statements = [s for s in statements if "crew_members" in s]
+    assert crew_statements
+    for statement in statements:
+        assert not re.search(r"\bname\b", statement)
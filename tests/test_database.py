@@ -0,0 +1,84 @@
+"""
+Tests for read replica routing
+"""
+
+import time
+from collections import Counter
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app import database
+from app.database import READ_PRIMARY_COOKIE, READ_PRIMARY_HEADER, ReplicaPool
+from app.main import app
+from app.models import Base, Unit
+
+def _seed(bind, name):
+    Base.metadata.create_all(bind)
+    with Session(bind) as db:
+        db.merge(Unit(id="source", name=name))
+        db.commit()
+
+@pytest.fixture
+def replicas(tmp_path, monkeypatch):
+    """Two SQLite replica files, each holding a unit named after the database that served it"""
+    pool = ReplicaPool(
+        [f"sqlite:///{tmp_path / 'r1.db'}", f"sqlite:///{tmp_path / 'r2.db'}"],
+        primary=database.engine
+    )
+    for replica, name in zip(pool.engines, ("r1", "r2")):
+        _seed(replica, name)
+    _seed(database.engine, "primary")
+    monkeypatch.setattr(database, "replica_pool", pool)
+    yield pool
+    for replica in pool.engines:
+        replica.dispose()
+
+def _served_by(client, **kwargs):
+    response = client.get("/api/v1/units", **kwargs)
+    assert response.status_code == 200
+    return next(unit["name"] for unit in response.json()["data"] if unit["id"] == "source")
+
+def test_reads_are_spread_evenly_across_replicas(replicas):
+    client = TestClient(app)
+    assert Counter(_served_by(client) for _ in range(100)) == {"r1": 50, "r2": 50}
+
+def test_unreachable_replica_is_ejected_and_reads_fall_back(tmp_path, monkeypatch):
+    pool = ReplicaPool([f"sqlite:///{tmp_path / 'missing' / 'r1.db'}"], primary=database.engine)
+    _seed(database.engine, "primary")
+    monkeypatch.setattr(database, "replica_pool", pool)
+    client = TestClient(app)
+
+    # The very first read succeeds on the primary instead of failing
+    assert _served_by(client) == "primary"
+    assert pool.status()[0]["healthy"] is False
+    assert _served_by(client) == "primary"
+
+def test_failed_replica_retries_on_the_next_healthy_one(tmp_path, monkeypatch):
+    pool = ReplicaPool(
+        [f"sqlite:///{tmp_path / 'missing' / 'r0.db'}", f"sqlite:///{tmp_path / 'r1.db'}"],
+        primary=database.engine
+    )
+    _seed(pool.engines[1], "r1")
+    monkeypatch.setattr(database, "replica_pool", pool)
+    client = TestClient(app)
+
+    assert [_served_by(client) for _ in range(3)] == ["r1", "r1", "r1"]
+    assert [replica["healthy"] for replica in pool.status()] == [False, True]
+
+def test_header_and_cookie_pin_reads_to_the_primary(replicas):
+    client = TestClient(app)
+    assert _served_by(client, headers={READ_PRIMARY_HEADER: "1"}) == "primary"
+
+    client.cookies.set(READ_PRIMARY_COOKIE, str(time.time() + 30))
+    assert _served_by(client) == "primary"
+
+    client.cookies.set(READ_PRIMARY_COOKIE, str(time.time() - 1))
+    assert _served_by(client) in ("r1", "r2")
+
+def test_submission_sets_the_read_your_writes_cookie(replicas):
+    client = TestClient(app)
+    response = client.post("/api/v1/orm/submit", json={"flight": "x"})
+    assert READ_PRIMARY_COOKIE in response.cookies
+    assert _served_by(client) == "primary"
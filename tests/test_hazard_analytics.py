@@ -0,0 +1,141 @@
+"""
+Tests for hazard co-occurrence analytics
+"""
+
+import itertools
+import random
+from collections import OrderedDict
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app import hazard_analytics
+from app.hazard_analytics import SEVERITY_RANK, compute_cooccurrence, encode_hazard_rows
+from app.models import Flight, FlightHazard, SeverityLevel, Unit
+
+HAZARDS = [f"Hazard {i}" for i in range(12)]
+
+def _rows(n_flights=400, seed=7):
+    rng = random.Random(seed)
+    rows = []
+    for f in range(n_flights):
+        score = rng.randint(0, 40)
+        for hazard in rng.sample(HAZARDS, rng.randint(1, 6)):
+            rows.append((f"flight-{f}", hazard, rng.choice(list(SeverityLevel) + [None]), score))
+    rng.shuffle(rows)
+    return rows
+
+def _chunks(rows, size=150):
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+def _brute_force(rows, min_severity):
+    flights, scores, present = set(), {}, {}
+    for flight_id, hazard, severity, score in rows:
+        flights.add(flight_id)
+        scores[flight_id] = score
+        if SEVERITY_RANK[severity] >= min_severity:
+            present.setdefault(flight_id, set()).add(hazard)
+
+    support, pairs = {}, {}
+    for hazards in present.values():
+        for hazard in hazards:
+            support[hazard] = support.get(hazard, 0) + 1
+        for pair in itertools.combinations(sorted(hazards), 2):
+            pairs[pair] = pairs.get(pair, 0) + 1
+    return len(flights), support, pairs, scores, present
+
+def test_encode_codes_are_stable_across_chunks():
+    rows = _rows()
+    flight_codes, hazard_codes, labels, severities, flight_scores = encode_hazard_rows(_chunks(rows))
+
+    assert len(labels) == len(set(labels)) == len(HAZARDS)
+    for i, (flight_id, hazard, severity, score) in enumerate(rows):
+        assert labels[hazard_codes[i]] == hazard
+        assert severities[i] == SEVERITY_RANK[severity]
+        assert flight_scores[flight_codes[i]] == score
+
+    # Same flight id -> same code, however its rows were split across chunks
+    by_flight = {}
+    for code, (flight_id, *_rest) in zip(flight_codes, rows):
+        assert by_flight.setdefault(flight_id, code) == code
+    assert len(by_flight) == flight_scores.size
+
+def test_encode_empty_stream():
+    flight_codes, hazard_codes, labels, severities, flight_scores = encode_hazard_rows(iter([]))
+    assert flight_codes.size == hazard_codes.size == severities.size == flight_scores.size == 0
+    assert compute_cooccurrence(flight_codes, hazard_codes, labels, severities, flight_scores)["total_flights"] == 0
+
+def test_cooccurrence_matches_brute_force():
+    rows = _rows()
+    for min_severity in (0, 1, 2):
+        result = compute_cooccurrence(
+            *encode_hazard_rows(_chunks(rows)), min_support=1, top=10000, min_severity=min_severity
+        )
+        n_flights, support, pairs, scores, present = _brute_force(rows, min_severity)
+
+        assert result["total_flights"] == n_flights
+        assert {h["hazard"]: h["flights"] for h in result["hazards"]} == support
+        got = {tuple(sorted((p["hazard_a"], p["hazard_b"]))): p for p in result["pairs"]}
+        assert {pair: p["count"] for pair, p in got.items()} == pairs
+
+        for (a, b), p in got.items():
+            expected_lift = pairs[(a, b)] * n_flights / (support[a] * support[b])
+            assert abs(p["lift"] - round(expected_lift, 4)) < 1e-4
+
+        # Point-biserial correlation against NumPy's Pearson coefficient
+        flight_ids = sorted(scores)
+        score_vector = np.array([scores[f] for f in flight_ids], dtype=float)
+        for hazard in result["hazards"]:
+            indicator = np.array([hazard["hazard"] in present.get(f, ()) for f in flight_ids], dtype=float)
+            expected = np.corrcoef(indicator, score_vector)[0, 1] if indicator.std() else 0.0
+            assert abs(hazard["risk_correlation"] - round(float(expected), 4)) < 1e-3
+
+def test_severity_threshold_drops_low_rated_hazards():
+    rows = [
+        ("f1", "Weather", SeverityLevel.HIGH, 30),
+        ("f1", "Fatigue", SeverityLevel.LOW, 30),
+        ("f2", "Weather", SeverityLevel.MEDIUM, 10),
+        ("f2", "Fatigue", SeverityLevel.HIGH, 10),
+        ("f3", "Fatigue", None, 5),
+    ]
+    result = compute_cooccurrence(*encode_hazard_rows([rows]), min_severity=SEVERITY_RANK[SeverityLevel.MEDIUM])
+
+    assert result["total_flights"] == 3
+    assert {h["hazard"]: h["flights"] for h in result["hazards"]} == {"Weather": 2, "Fatigue": 1}
+    assert [(p["hazard_a"], p["hazard_b"], p["count"]) for p in result["pairs"]] in (
+        [("Weather", "Fatigue", 1)], [("Fatigue", "Weather", 1)]
+    )
+
+def _add_hazard_flights(db, n):
+    db.add(Unit(id="u1", name="Unit 1"))
+    for i in range(n):
+        db.add(Flight(id=f"f{i}", unit_id="u1", flight_date=datetime.utcnow() - timedelta(days=1), total_risk_score=i))
+        db.add(FlightHazard(flight_id=f"f{i}", hazard_id="wx", hazard_name="Weather", selected_severity=SeverityLevel.HIGH))
+    db.commit()
+
+def test_primary_pinned_reads_do_not_reuse_replica_results(db, tmp_path, flight_archive, monkeypatch):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.models import Base
+
+    monkeypatch.setattr(hazard_analytics, "_cache", OrderedDict())
+    primary_engine = create_engine(f"sqlite:///{tmp_path / 'primary.db'}")
+    Base.metadata.create_all(primary_engine)
+    primary = Session(primary_engine)
+
+    # The replica lags one flight behind the primary
+    _add_hazard_flights(db, 1)
+    _add_hazard_flights(primary, 2)
+    end = datetime.utcnow()
+    window = (end - timedelta(days=30), end, 30)
+
+    try:
+        on_replica = hazard_analytics.get_hazard_cooccurrence(db, *window, read_target="replica")
+        on_primary = hazard_analytics.get_hazard_cooccurrence(primary, *window, read_target="primary")
+        assert (on_replica["total_flights"], on_primary["total_flights"]) == (1, 2)
+
+        # Each target still reuses its own cached result
+        assert hazard_analytics.get_hazard_cooccurrence(primary, *window, read_target="replica") is on_replica
+    finally:
+        primary.close()
+        primary_engine.dispose()
@@ -0,0 +1,98 @@
+"""
+Tests for the in-memory live board
+"""
+
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+
+from app.live_board import LiveBoard, LiveFlight
+from app.models import Flight, Unit
+
+def _flight(db, unit_id="u1", hours_ago=1, **fields):
+    flight = Flight(unit_id=unit_id, flight_date=datetime.utcnow() - timedelta(hours=hours_ago), **fields)
+    db.add(flight)
+    db.commit()
+    return flight
+
+def test_latest_orders_and_evicts_by_retention_window(db):
+    db.add(Unit(id="u1", name="Unit 1"))
+    db.add(Unit(id="u2", name="Unit 2"))
+    newest = _flight(db, hours_ago=1)
+    _flight(db, unit_id="u2", hours_ago=2)
+    _flight(db, hours_ago=3)
+    _flight(db, hours_ago=30)
+    _flight(db, hours_ago=2, is_pii_scrubbed=True)
+
+    board = LiveBoard(retention_hours=24)
+    board.reconcile(db)
+
+    latest = board.latest(10)
+    assert [r.id for r in latest][0] == newest.id
+    assert len(latest) == 3
+    assert [r.flight_date for r in latest] == sorted((r.flight_date for r in latest), reverse=True)
+    assert board.count("u1") == 2 and board.count("u2") == 1
+
+    board.retention = timedelta(hours=1, minutes=30)
+    assert [r.id for r in board.latest(10)] == [newest.id]
+
+def test_reconcile_replays_local_writes_made_during_its_query(db):
+    db.add(Unit(id="u1", name="Unit 1"))
+    existing = _flight(db, hours_ago=2)
+    board = LiveBoard(retention_hours=24)
+
+    # Commits landing in this worker while the rebuild query runs are not in its snapshot
+    late = LiveFlight(Flight(id="late", unit_id="u1", flight_date=datetime.utcnow(), is_pii_scrubbed=False))
+    gone = existing.id
+
+    def commit_during_query(*args):
+        board.upsert(late)
+        board.remove(gone)
+
+    event.listen(db.get_bind(), "after_cursor_execute", commit_during_query)
+    try:
+        board.reconcile(db)
+    finally:
+        event.remove(db.get_bind(), "after_cursor_execute", commit_during_query)
+
+    assert [r.id for r in board.latest(10)] == ["late"]
+
+def test_live_requests_do_not_touch_the_database(monkeypatch):
+    from fastapi.testclient import TestClient
+    from app import database, main
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+    db.merge(Unit(id="u1", name="Unit 1"))
+    _flight(db, hours_ago=1)
+    db.close()
+
+    board = LiveBoard(retention_hours=24, reconcile_seconds=3600)
+    monkeypatch.setattr(main, "live_board", board)
+    client = TestClient(main.app)
+
+    checkouts = []
+    listener = lambda *args: checkouts.append(1)
+    event.listen(database.engine, "checkout", listener)
+    try:
+        first = client.get("/api/v1/flights?live=true")
+        reconciled = len(checkouts)
+        polls = [client.get("/api/v1/flights?live=true&limit=5") for _ in range(10)]
+        database_read = client.get("/api/v1/flights?limit=5")
+    finally:
+        event.remove(database.engine, "checkout", listener)
+
+    assert first.json()["source"] == "live" and first.json()["total"] >= 1
+    assert reconciled == 1
+    assert all(poll.json()["source"] == "live" for poll in polls)
+    assert database_read.json()["source"] == "database"
+    assert len(checkouts) == reconciled + 1
+
+def test_flights_limit_must_be_positive():
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    client = TestClient(app)
+    assert client.get("/api/v1/flights?limit=-1&live=true").status_code == 400
+    assert client.get("/api/v1/flights?limit=0").status_code == 400
+    assert LiveBoard().latest(-1) == []
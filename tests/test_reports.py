@@ -0,0 +1,244 @@
+"""
+Tests for background report jobs and their access rules
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import reports
+from app.auth import create_access_token
+from app.database import SessionLocal
+from app.main import app
+from app.models import Flight, Unit, User, UserRole
+
+@pytest.fixture(scope="module")
+def client():
+    db = SessionLocal()
+    try:
+        for unit_id in ("u1", "u2"):
+            db.merge(Unit(id=unit_id, name=unit_id.upper()))
+        db.merge(User(id="admin", name="Admin", email="admin@example.mil", role=UserRole.ADMIN, can_export=True))
+        db.merge(User(id="lead1", name="Lead 1", email="lead1@example.mil", role=UserRole.UNIT_LEAD,
+                      unit_access=["u1"], can_export=True))
+        db.merge(User(id="lead2", name="Lead 2", email="lead2@example.mil", role=UserRole.UNIT_LEAD,
+                      unit_access=["u2"], can_export=True))
+        db.merge(User(id="viewer", name="Viewer", email="viewer@example.mil", role=UserRole.UNIT_LEAD,
+                      unit_access=["u1"], can_export=False))
+        db.add(Flight(unit_id="u1", flight_date=datetime.utcnow() - timedelta(days=2), total_risk_score=12))
+        db.commit()
+    finally:
+        db.close()
+    with TestClient(app) as test_client:
+        yield test_client
+
+def _auth(user_id):
+    return {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+def _wait(client, job_id, headers):
+    for _ in range(300):
+        job = client.get(f"/api/v1/reports/{job_id}", headers=headers).json()["data"]
+        if job["status"] in ("complete", "failed"):
+            return job
+        time.sleep(0.1)
+    raise AssertionError("report job did not finish")
+
+def test_report_endpoints_require_a_valid_token(client):
+    assert client.post("/api/v1/reports?format=csv").status_code == 401
+    assert client.post("/api/v1/reports?format=csv", headers={"Authorization": "Bearer nope"}).status_code == 401
+    assert client.post("/api/v1/reports?format=csv", headers={"X-User-Id": "admin"}).status_code == 401
+    assert client.post("/api/v1/reports?format=csv", headers=_auth("viewer")).status_code == 403
+
+def test_reports_are_limited_to_the_units_a_user_can_access(client):
+    response = client.post("/api/v1/reports?unit_id=u1&days=7&format=csv", headers=_auth("admin"))
+    assert response.status_code == 200
+    job = _wait(client, response.json()["data"]["id"], _auth("admin"))
+    assert job["status"] == "complete"
+    assert job["unit_ids"] == ["u1"]
+
+    path = f"/api/v1/reports/{job['id']}"
+    assert client.get(path, headers=_auth("lead2")).status_code == 403
+    assert client.get(f"{path}/download", headers=_auth("lead2")).status_code == 403
+    assert client.get(path, headers=_auth("lead1")).status_code == 200
+    download = client.get(f"{path}/download", headers=_auth("lead1"))
+    assert download.status_code == 200
+    assert b"ORM Dashboard Report" in download.content
+
+    # An all-units report is admin-only
+    response = client.post("/api/v1/reports?days=7&format=csv", headers=_auth("admin"))
+    all_units = response.json()["data"]["id"]
+    assert client.get(f"/api/v1/reports/{all_units}", headers=_auth("lead1")).status_code == 403
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    """ReportJobs running in threads so tests can swap the generator"""
+    registry = reports.ReportJobs(str(tmp_path / "reports"), timeout_seconds=60)
+    registry._executor = ThreadPoolExecutor(max_workers=1)
+    yield registry
+    registry._executor.shutdown(wait=True)
+
+def _settle(jobs, job_id):
+    for _ in range(100):
+        status = jobs.status(job_id)
+        if status["status"] in ("complete", "failed") and not jobs._futures:
+            return status
+        time.sleep(0.02)
+    raise AssertionError("job did not settle")
+
+def test_failed_jobs_are_pruned_and_resubmitted(jobs, db, monkeypatch):
+    day = date.today()
+    calls = []
+
+    def flaky(database_url, job, artifact_path, replica_url=None):
+        calls.append(job["id"])
+        if len(calls) == 1:
+            raise RuntimeError("database went away")
+        with open(artifact_path, "w") as f:
+            f.write("ok")
+
+    monkeypatch.setattr(reports, "generate_report", flaky)
+
+    job = jobs.submit(db, ["u1"], day, day, "csv")
+    failed = _settle(jobs, job["id"])
+    assert failed["status"] == "failed"
+    assert "database went away" in failed["error"]
+    assert jobs._futures == {}
+
+    retried = _settle(jobs, jobs.submit(db, ["u1"], day, day, "csv")["id"])
+    assert retried["status"] == "complete" and retried["error"] is None
+    assert len(calls) == 2
+
+    # A finished job is served from its artifact, not rerun
+    assert jobs.submit(db, ["u1"], day, day, "csv")["status"] == "complete"
+    assert len(calls) == 2
+
+def test_abandoned_jobs_time_out_and_can_be_resubmitted(jobs, db, monkeypatch):
+    day = date.today()
+    monkeypatch.setattr(reports, "generate_report", lambda url, job, path, replica_url=None: open(path, "w").close())
+
+    job = jobs.submit(db, None, day, day, "csv")
+    job_id = job["id"]
+    _settle(jobs, job_id)
+
+    # Simulate a worker that died mid-job: meta without artifact or future
+    artifact_path, meta_path = jobs._paths(job_id)
+    os.remove(artifact_path)
+    with open(meta_path) as f:
+        meta = json.load(f)
+    assert jobs.status(job_id)["status"] == "pending"
+
+    meta["created_at"] = (datetime.utcnow() - timedelta(seconds=61)).isoformat()
+    with open(meta_path, "w") as f:
+        json.dump(meta, f)
+    assert jobs.status(job_id)["status"] == "failed"
+
+    assert _settle(jobs, jobs.submit(db, None, day, day, "csv")["id"])["status"] == "complete"
+
+def test_broken_pool_is_replaced_after_a_render_process_dies(tmp_path, db):
+    from concurrent.futures.process import BrokenProcessPool
+
+    registry = reports.ReportJobs(str(tmp_path / "reports"), max_workers=1)
+    try:
+        # Simulate an OOM kill of the render process
+        crashed = registry._pool().submit(os._exit, 1)
+        with pytest.raises(BrokenProcessPool):
+            crashed.result(timeout=60)
+
+        day = date.today()
+        job = registry.submit(db, ["u1"], day, day, "csv")
+        assert job["status"] in ("queued", "running", "complete")
+        for _ in range(600):
+            if registry.status(job["id"])["status"] == "complete":
+                break
+            time.sleep(0.1)
+        assert registry.status(job["id"])["status"] == "complete"
+    finally:
+        registry.shutdown()
+
+def test_a_refused_submit_is_reported_failed_not_pending(jobs, db, monkeypatch):
+    def refuse(*args):
+        raise RuntimeError("cannot start new thread")
+
+    monkeypatch.setattr(jobs._executor, "submit", refuse)
+    day = date.today()
+    job = jobs.submit(db, ["u1"], day, day, "csv")
+    assert job["status"] == "failed" and "cannot start new thread" in job["error"]
+    assert jobs._futures == {}
+
+    monkeypatch.undo()
+    monkeypatch.setattr(reports, "generate_report", lambda url, job, path, replica_url=None: open(path, "w").close())
+    assert _settle(jobs, jobs.submit(db, ["u1"], day, day, "csv")["id"])["status"] == "complete"
+
+def _report_db(path, flights):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+    from app.models import Base
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        db.add(Unit(id="u1", name="U1"))
+        for days_ago, score in flights:
+            db.add(Flight(id=f"f{days_ago}-{score}", unit_id="u1", total_risk_score=score,
+                          flight_date=datetime.utcnow() - timedelta(days=days_ago),
+                          last_edited=datetime(2026, 1, 1), submitted_at=datetime(2026, 1, 1)))
+        db.commit()
+        day = date.today()
+        start = datetime.combine(day - timedelta(days=9), datetime.min.time())
+        end = datetime.combine(day + timedelta(days=1), datetime.min.time())
+        version = reports.data_version(db, ["u1"], start, end)
+    engine.dispose()
+    job = {"id": "x", "format": "csv", "unit_ids": ["u1"], "scope_label": "u1",
+           "start": start.isoformat(), "end": end.isoformat(), "data_version": version}
+    return f"sqlite:///{path}", job
+
+def _report_flights(path):
+    with open(path) as f:
+        lines = f.read().splitlines()
+    return int(lines[lines.index("Summary") + 2].split(",")[0])
+
+def test_report_sections_come_from_a_current_replica(tmp_path, monkeypatch):
+    primary_url, job = _report_db(tmp_path / "primary.db", [(1, 10), (2, 20)])
+    replica_url, _ = _report_db(tmp_path / "replica.db", [(1, 10), (2, 20)])
+    used = []
+    real_create_engine = reports.create_engine
+    monkeypatch.setattr(reports, "create_engine", lambda url, **kw: used.append(url) or real_create_engine(url, **kw))
+
+    reports.generate_report(primary_url, job, str(tmp_path / "report.csv"), replica_url=replica_url)
+
+    assert used == [replica_url]
+    assert _report_flights(tmp_path / "report.csv") == 2
+
+def test_lagging_or_unreachable_replica_falls_back_to_the_primary(tmp_path, monkeypatch):
+    primary_url, job = _report_db(tmp_path / "primary.db", [(1, 10), (2, 20)])
+    lagging_url, _ = _report_db(tmp_path / "replica.db", [(2, 20)])
+    used = []
+    real_create_engine = reports.create_engine
+    monkeypatch.setattr(reports, "create_engine", lambda url, **kw: used.append(url) or real_create_engine(url, **kw))
+
+    reports.generate_report(primary_url, job, str(tmp_path / "lagging.csv"), replica_url=lagging_url)
+    assert used == [lagging_url, primary_url]
+    assert _report_flights(tmp_path / "lagging.csv") == 2
+
+    used.clear()
+    missing_url = f"sqlite:///{tmp_path / 'missing' / 'replica.db'}"
+    reports.generate_report(primary_url, job, str(tmp_path / "missing.csv"), replica_url=missing_url)
+    assert used == [missing_url, primary_url]
+    assert _report_flights(tmp_path / "missing.csv") == 2
+
+def test_submit_hands_render_processes_a_replica(jobs, db, tmp_path, monkeypatch):
+    from app.database import ReplicaPool, engine
+
+    replica_file = f"sqlite:///{tmp_path / 'replica.db'}"
+    monkeypatch.setattr(reports, "replica_pool", ReplicaPool([replica_file], primary=engine))
+    calls = []
+    monkeypatch.setattr(reports, "generate_report", lambda url, job, path, replica_url=None: calls.append(replica_url) or open(path, "w").close())
+
+    day = date.today()
+    _settle(jobs, jobs.submit(db, ["u1"], day, day, "csv")["id"])
+    assert calls == [replica_file]
@@ -0,0 +1,118 @@
+"""
+Tests for risk score distributions and stored per-day sketches
+"""
+
+from datetime import datetime, timedelta
+
+from app.models import Flight, RiskScoreSketch, Unit
+from app.risk_distribution import _day_digests, get_risk_distribution
+from app.tdigest import TDigest
+
+METRIC = "flight_risk_score"
+
+def _add_flights(db, day, scores, unit_id="u1"):
+    for i, score in enumerate(scores):
+        db.add(Flight(unit_id=unit_id, flight_date=datetime.combine(day, datetime.min.time()) + timedelta(minutes=i),
+                      total_risk_score=score))
+    db.commit()
+
+def _stored(db):
+    return {
+        row.day: row
+        for row in db.query(RiskScoreSketch).filter(RiskScoreSketch.scope == "*", RiskScoreSketch.metric == METRIC)
+    }
+
+def test_day_digests_store_and_reuse_sketches(db, flight_archive):
+    db.add(Unit(id="u1", name="Unit 1"))
+    first = (datetime.utcnow() - timedelta(days=5)).date()
+    for offset in range(3):
+        _add_flights(db, first + timedelta(days=offset), [10 + offset] * (offset + 2))
+
+    digests = _day_digests(db, METRIC, None, first, first + timedelta(days=2))
+    assert sorted(d.count for d in digests) == [2, 3, 4]
+    assert {day: row.row_count for day, row in _stored(db).items()} == {
+        first: 2, first + timedelta(days=1): 3, first + timedelta(days=2): 4
+    }
+
+    # An unchanged day is served from its stored sketch, not rescanned
+    sentinel = TDigest()
+    sentinel.update([99, 99])
+    stored = _stored(db)[first]
+    stored.sketch = sentinel.to_dict()
+    db.commit()
+
+    digests = _day_digests(db, METRIC, None, first, first + timedelta(days=2))
+    assert any(d.max == 99 for d in digests)
+
+def test_day_digests_rebuild_stale_days(db, flight_archive):
+    db.add(Unit(id="u1", name="Unit 1"))
+    first = (datetime.utcnow() - timedelta(days=5)).date()
+    second = first + timedelta(days=1)
+    _add_flights(db, first, [5, 6])
+    _add_flights(db, second, [20, 21, 22])
+    _day_digests(db, METRIC, None, first, second)
+
+    # A late submission changes the day's row count, so only that day is rebuilt
+    _add_flights(db, second, [40])
+    untouched = _stored(db)[first].updated_at
+
+    digests = _day_digests(db, METRIC, None, first, second)
+    assert sorted(d.count for d in digests) == [2, 4]
+    assert max(d.max for d in digests) == 40
+
+    stored = _stored(db)
+    assert stored[second].row_count == 4
+    assert TDigest.from_dict(stored[second].sketch).max == 40
+    assert stored[first].updated_at == untouched
+
+def test_sqlite_distribution_merges_sketches_and_partial_days(db, flight_archive):
+    db.add(Unit(id="u1", name="Unit 1"))
+    now = datetime.utcnow()
+    scores = []
+    for days_ago in range(1, 10):
+        day_scores = [(days_ago * 7 + i) % 45 for i in range(40)]
+        _add_flights(db, (now - timedelta(days=days_ago)).date(), day_scores)
+        scores += day_scores
+
+    result = get_risk_distribution(db, now - timedelta(days=12), now, bins=5, upper=50)
+    flights = result["flight_risk_score"]
+
+    assert flights["approximate"] is True
+    assert flights["count"] == len(scores)
+    assert sum(bucket["count"] for bucket in flights["histogram"]) == len(scores)
+    assert (flights["min"], flights["max"]) == (min(scores), max(scores))
+    assert abs(flights["percentiles"]["p50"] - sorted(scores)[len(scores) // 2]) <= 1.5
+
+def test_sketch_histogram_matches_exact_bins_for_fractional_edges(db, flight_archive):
+    db.add(Unit(id="u1", name="Unit 1"))
+    now = datetime.utcnow()
+    scores = []
+    for days_ago in range(1, 4):
+        day_scores = [10, 11, 12, 13, 14] + [(days_ago * 5 + i) % 53 for i in range(12)]
+        _add_flights(db, (now - timedelta(days=days_ago)).date(), day_scores)
+        scores += day_scores
+
+    # Width 10/3: edges such as 13.33 and 16.67 fall between integer scores
+    histogram = get_risk_distribution(db, now - timedelta(days=5), now, bins=15, upper=50)["flight_risk_score"]["histogram"]
+
+    exact = [
+        sum(1 for s in scores if bucket["lower"] <= s and (bucket["upper"] is None or s < bucket["upper"]))
+        for bucket in histogram
+    ]
+    assert [bucket["count"] for bucket in histogram] == exact
+
+def test_day_digests_rebuild_days_with_edited_scores(db, flight_archive):
+    db.add(Unit(id="u1", name="Unit 1"))
+    first = (datetime.utcnow() - timedelta(days=5)).date()
+    _add_flights(db, first, [5, 6, 7])
+    _day_digests(db, METRIC, None, first, first)
+
+    # Same row count, but a score was edited after the sketch was stored
+    flight = db.query(Flight).filter(Flight.total_risk_score == 7).one()
+    flight.total_risk_score = 30
+    flight.last_edited = datetime.utcnow() + timedelta(seconds=1)
+    db.commit()
+
+    digests = _day_digests(db, METRIC, None, first, first)
+    assert [d.max for d in digests] == [30]
+    assert TDigest.from_dict(_stored(db)[first].sketch).max == 30
@@ -0,0 +1,71 @@
+"""
+Tests for the merging t-digest
+"""
+
+import json
+
+import numpy as np
+
+from app.tdigest import TDigest
+
+def _digest(values):
+    digest = TDigest()
+    digest.update(values)
+    return digest
+
+def _rank_error(values, estimate, q):
+    """Distance between q and the empirical rank of the estimate"""
+    ordered = np.sort(values)
+    lower = np.searchsorted(ordered, estimate, side="left") / ordered.size
+    upper = np.searchsorted(ordered, estimate, side="right") / ordered.size
+    return 0.0 if lower <= q <= upper else min(abs(q - lower), abs(q - upper))
+
+def test_quantiles_are_accurate_at_the_tails():
+    values = np.random.default_rng(1).gamma(2.0, 6.0, 50000)
+    digest = _digest(values.tolist())
+
+    assert digest.count == values.size
+    assert digest.min == values.min() and digest.max == values.max()
+    for q in (0.5, 0.9, 0.99):
+        assert _rank_error(values, digest.quantile(q), q) < 0.005
+
+def test_merged_digests_match_a_single_pass():
+    rng = np.random.default_rng(2)
+    days = [rng.normal(20 + day, 5, 3000) for day in range(30)]
+    everything = np.concatenate(days)
+
+    merged = TDigest()
+    for values in days:
+        merged.merge(_digest(values.tolist()))
+
+    assert merged.count == everything.size
+    for q in (0.5, 0.9, 0.99):
+        assert _rank_error(everything, merged.quantile(q), q) < 0.005
+    assert abs(merged.cdf(np.median(everything)) - 0.5) < 0.01
+
+def test_serialization_round_trip_preserves_the_sketch():
+    values = np.random.default_rng(3).integers(0, 50, 20000)
+    digest = _digest(values.tolist())
+
+    # Stored as JSON in risk_score_sketches.sketch
+    restored = TDigest.from_dict(json.loads(json.dumps(digest.to_dict())))
+
+    assert restored.count == digest.count
+    assert (restored.min, restored.max) == (digest.min, digest.max)
+    for q in (0.01, 0.5, 0.9, 0.99):
+        assert restored.quantile(q) == digest.quantile(q)
+    for x in (0, 10, 25, 49):
+        assert restored.cdf(x) == digest.cdf(x)
+
+    # A restored digest keeps merging like the original
+    more = _digest(values[:5000].tolist())
+    restored.merge(more)
+    digest.merge(more)
+    assert restored.count == digest.count
+    assert abs(restored.quantile(0.9) - digest.quantile(0.9)) < 0.5
+
+def test_empty_digest():
+    digest = TDigest()
+    assert digest.quantile(0.5) is None
+    assert digest.cdf(10) == 0.0
+    assert TDigest.from_dict(digest.to_dict()).count == 0